@@ -0,0 +1,193 @@
+'''Packs the finished animation frames of every sprite into one atlas image cached on disk'''
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+from os import path, makedirs
+
+import pygame as pg
+
+# Local imports
+from settings import CACHE_PATH, ATLAS_WIDTH, IMAGE_PATH, DATA_PATH
+
+# Bumped when the layout of the cached files changes
+FORMAT = 2
+
+# Every frame set in the atlas: name -> (builder as 'module:function', files it reads).
+# A builder returns {set name: [surfaces]}, builders are imported when the atlas is loaded
+BUILDERS = {
+    'mario': ('characters.mario:build_frames', (path.join(IMAGE_PATH, 'mario.png'), path.join(DATA_PATH, 'mario.json'))),
+    'goomba': ('characters.enemies:build_frames', (path.join(IMAGE_PATH, 'goomba_sprites.png'),)),
+    'coin': ('particles:build_coin_frames', (path.join(IMAGE_PATH, 'coin_sheet.png'),)),
+}
+
+IMAGE_FILE = path.join(CACHE_PATH, 'atlas.png')
+INDEX_FILE = path.join(CACHE_PATH, 'atlas.json')
+
+# Frame sets of every builder once the atlas is loaded by this process
+_frames = None
+
+
+def _builder(target):
+    module, function = target.split(':')
+
+    return getattr(importlib.import_module(module), function)
+
+
+def _constants(code, namespace):
+    '''Yields the names and values of the plain constants a function and its inner functions read'''
+    for name in code.co_names:
+        value = namespace.get(name)
+        if isinstance(value, (bool, int, float, str, tuple)):
+            yield name, value
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _constants(const, namespace)
+
+
+def atlas_hash(builders=BUILDERS):
+    '''Returns a hash of everything the frames are made from.
+
+    That is the files each builder reads, the source code of the builder (so
+    editing a slice rect or a scale rebuilds the atlas) and the values of the
+    module constants it uses, such as PLAYER_SCALAR.
+    '''
+    digest = hashlib.sha1(repr(FORMAT).encode())
+    for name, (target, sources) in sorted(builders.items()):
+        build = _builder(target)
+        digest.update(name.encode())
+        digest.update(inspect.getsource(build).encode())
+        digest.update(repr(sorted(set(_constants(build.__code__, build.__globals__)))).encode())
+        for source in sources:
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def pack(frame_sets):
+    '''Packs frames row by row into one surface, returns the surface and the frame rects'''
+    x = y = row_height = 0
+    index = {}
+    for name, frames in frame_sets.items():
+        rects = []
+        for frame in frames:
+            width, height = frame.get_size()
+            if x + width > ATLAS_WIDTH:
+                # Start a new row
+                x = 0
+                y += row_height
+                row_height = 0
+            rects.append([x, y, width, height])
+            x += width
+            row_height = max(row_height, height)
+        index[name] = rects
+
+    atlas = pg.Surface((ATLAS_WIDTH, max(y + row_height, 1)), pg.SRCALPHA)
+    for name, frames in frame_sets.items():
+        for frame, rect in zip(frames, index[name]):
+            atlas.blit(frame, rect[:2])
+
+    return atlas, index
+
+
+def unpack(atlas, index):
+    '''Returns the frame sets as subsurfaces of the atlas'''
+    return {name: [atlas.subsurface(rect) for rect in rects] for name, rects in index.items()}
+
+
+def build():
+    '''Runs every builder and packs all their frames into one surface.
+
+    Returns the surface and {builder name: {set name: rects}}.
+    '''
+    frame_sets = {}
+    for name, (target, _) in BUILDERS.items():
+        for set_name, frames in _builder(target)().items():
+            frame_sets[f'{name}/{set_name}'] = frames
+    atlas, rects = pack(frame_sets)
+    index = {name: {} for name in BUILDERS}
+    for key, set_rects in rects.items():
+        name, set_name = key.split('/', 1)
+        index[name][set_name] = set_rects
+
+    return atlas, index
+
+
+def load_atlas():
+    '''Returns the frame sets of every builder, {builder name: {set name: [surfaces]}}.
+
+    The atlas is read from the cache with a single image decode. If it is
+    missing, unreadable or its hash does not match, every builder runs and
+    the atlas is written again.
+    '''
+    global _frames
+    if _frames is not None:
+        return _frames
+
+    key = atlas_hash()
+    _frames = _read_cache(key)
+    if _frames is None:
+        atlas, index = build()
+        _write_cache(atlas, index, key)
+        _frames = {name: unpack(atlas, rects) for name, rects in index.items()}
+
+    return _frames
+
+
+def _read_cache(key):
+    '''Returns the frame sets of the cached atlas if it was built from key, None otherwise'''
+    try:
+        with open(INDEX_FILE) as f:
+            cached = json.load(f)
+        if cached.get('hash') != key:
+            return None
+        atlas = pg.image.load(IMAGE_FILE).convert_alpha()
+
+        return {name: unpack(atlas, rects) for name, rects in cached['frames'].items()}
+    except Exception:
+        # Missing, unreadable or cut short, the atlas is just built again
+        return None
+
+
+def _write_cache(atlas, index, key):
+    '''Writes the atlas and its index to the cache.
+
+    Both are written to temporary files and moved into place, the image
+    first, so processes loading at the same time (VecMarioEnv workers)
+    never read a half written file or an index newer than its image.
+    '''
+    temp = path.join(CACHE_PATH, f'atlas.{os.getpid()}.tmp')
+    image_temp, index_temp = temp + '.png', temp + '.json'
+    try:
+        makedirs(CACHE_PATH, exist_ok=True)
+        pg.image.save(atlas, image_temp)
+        with open(index_temp, 'w') as f:
+            json.dump({'hash': key, 'frames': index}, f)
+        os.replace(image_temp, IMAGE_FILE)
+        os.replace(index_temp, INDEX_FILE)
+    except (OSError, pg.error):
+        # Read only install, the atlas is just built again next time
+        for name in (image_temp, index_temp):
+            if path.exists(name):
+                os.remove(name)
+
+
+def load_frames(name):
+    '''Returns the frame sets of one builder from the shared atlas'''
+    return load_atlas()[name]
+
+
+def main():
+    '''Rebuilds the atlas, run before shipping so the game starts from the cache'''
+    shutil.rmtree(CACHE_PATH, ignore_errors=True)
+
+    import game_setup
+    load_atlas()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+'''Camera that maps world coordinates to the screen'''
+
+import pygame as pg
+
+# Local imports
+from settings import WIDTH, HEIGHT, ACTIVATION_MARGIN
+
+
+def between(rect, prev, alpha):
+    '''Returns a copy of rect with its midbottom alpha of the way from prev to where it is'''
+    rect = rect.copy()
+    prev_x, prev_y = prev
+    rect.midbottom = (
+        round(prev_x + (rect.centerx - prev_x) * alpha),
+        round(prev_y + (rect.bottom - prev_y) * alpha)
+    )
+
+    return rect
+
+
+class Camera:
+    '''Keeps track of which part of the level is on screen.
+
+    Every entity lives in world coordinates, the camera offset is only
+    applied when something is drawn. Entities inside active_rect, the screen
+    plus a margin on every side, are the only ones that get simulated.
+    view is the part of the world that is drawn, which can trail rect by a
+    fraction of an update when drawing is interpolated.
+    '''
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        self.x = 0      # World x of the left edge of the screen
+        self.prev_x = 0 # x before the last update
+        self.rect = pg.Rect(0, 0, width, height)
+        self.active_rect = self.rect.inflate(ACTIVATION_MARGIN * 2, ACTIVATION_MARGIN * 2)
+        self.view = self.rect.copy()
+
+    def follow(self, target):
+        '''Scrolls forward once the target passes the middle of the screen'''
+        self.prev_x = self.x
+        if target.rect.centerx - self.x >= self.rect.width / 2:
+            self.x = target.rect.centerx - self.rect.width / 2
+        self.rect.x = round(self.x)
+        self.active_rect.center = self.rect.center
+        self.view.x = self.rect.x
+
+    def move_to(self, x, prev_x=None):
+        '''Puts the camera at world x, as if the last update moved it there from prev_x'''
+        self.x = x
+        self.prev_x = x if prev_x is None else prev_x
+        self.rect.x = round(self.x)
+        self.active_rect.center = self.rect.center
+        self.view.x = self.rect.x
+
+    def interpolate(self, alpha):
+        '''Moves the view alpha of the way from the previous to the current position'''
+        self.view.x = round(self.prev_x + (self.x - self.prev_x) * alpha)
+
+    def apply(self, rect):
+        '''Returns rect moved from world to screen coordinates'''
+        return rect.move(-self.view.x, 0)
+
+    def visible(self, sprites):
+        '''Returns the sprites that are on screen.
+
+        This looks at every sprite, large sets of static sprites are queried from the SpatialGrid instead.
+        '''
+        return [sprite for sprite in sprites if sprite.rect.colliderect(self.view)]
+
+    def active(self, sprites):
+        '''Returns the sprites inside the activation window, see visible for large sets'''
+        return [sprite for sprite in sprites if sprite.rect.colliderect(self.active_rect)]
+
+    def draw(self, win, sprites, previous=None, alpha=1):
+        '''Draws the sprites that are on screen, win can be a surface or a RenderQueue.
+
+        previous maps sprites to their rect's midbottom before the last update,
+        those are drawn alpha of the way from there to where they are.
+        '''
+        sprites = self.visible(sprites)
+        if not previous or alpha == 1:
+            win.blits([(sprite.image, self.apply(sprite.rect)) for sprite in sprites], doreturn=False)
+            return
+
+        blits = []
+        for sprite in sprites:
+            rect = sprite.rect
+            prev = previous.get(sprite)
+            if prev is not None:
+                rect = between(rect, prev, alpha)
+            blits.append((sprite.image, self.apply(rect)))
+        win.blits(blits, doreturn=False)
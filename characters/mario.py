@@ -1,29 +1,52 @@
 import json
+
 import pygame as pg
 
 # Local imports
 from objects.blocks import QuestionBox, Brick
 from powerups.powerup import Mushroom, FireFlower, Fireball, Star
-from game_setup import IMAGES, DATA, SOUND, MUSIC
+from game_setup import IMAGES, DATA, SOUND, MUSIC, MUSIC_PLAYER
 from powerups.powerup_states import *
 from settings import *
 from characters.entity_constants import *
 from characters.enemies import Goomba
-from tools import get_image
-import labels as lbl
+from tools import get_image, get_mask
+from atlas import load_frames
+from game_clock import RealClock
 
 # Pygame 2D vector
 vec = pg.math.Vector2
 
 
+def build_frames():
+    '''Slices, scales and flips every frame listed in the json data, see atlas'''
+    def flip_image_list(list_to_flip):
+        '''Returns a list of each image flipped horizontally'''
+        return [pg.transform.flip(frame, True, False) for frame in list_to_flip]
+
+    with open(DATA['mario']) as f:
+        data = json.load(f)
+
+    spritesheet = IMAGES['mario']
+    frame_sets = {}
+    for type in data:
+        img_list = [get_image(spritesheet, *img, PLAYER_SCALAR) for img in data[type]]
+        img_list[5] = pg.transform.flip(img_list[5], True, False)
+        frame_sets[type] = img_list
+        frame_sets[type + '-flipped'] = flip_image_list(img_list)
+
+    return frame_sets
+
+
 class Player(pg.sprite.Sprite):
     '''A class for the main player in the game'''    
-    def __init__(self):
+    def __init__(self, clock=None):
         super().__init__()
-        self.__load_images_from_file(IMAGES['mario'])
+        self.clock = clock or RealClock()
+        self.__load_images_from_file()
         self.image = self.normal_small_frames[0][0]
         self.rect = self.image.get_rect()
-        self.mask = pg.mask.from_surface(self.image)
+        self.mask = get_mask(self.image)
 
         # Score
         self.score = 0
@@ -69,7 +92,7 @@ class Player(pg.sprite.Sprite):
 
     def __setup_timers(self):
         '''Sets up timers'''
-        self.current_timer = pg.time.get_ticks()
+        self.current_timer = self.clock.now()
         self.transition_timer = 0
         self.walk_timer = 0
         self.invincible_begin_timer = 0
@@ -235,20 +258,12 @@ class Player(pg.sprite.Sprite):
             self.black_big_frames
         ]
 
-    def __load_images_from_file(self, spritesheet):
-        '''Uses json data to load all images'''
-        with open(DATA['mario']) as f:
-            data = json.load(f)
-        
-        def flip_image_list(list_to_flip):
-            '''Returns a list of each image flipped horizontally'''
-            return [pg.transform.flip(frame, True, False) for frame in list_to_flip]
-    
+    def __load_images_from_file(self):
+        '''Gets every frame listed in the json data from the atlas'''
+        frame_sets = load_frames('mario')
+
         def get_frames(type):
-            img_list = [get_image(spritesheet, *img, PLAYER_SCALAR) for img in data[type]]
-            img_list[5] = pg.transform.flip(img_list[5], True, False)
-        
-            return [img_list, flip_image_list(img_list)]
+            return [frame_sets[type], frame_sets[type + '-flipped']]
 
         self.normal_small_frames = get_frames('small-normal')
         self.green_small_frames  = get_frames('small-green')
@@ -278,7 +293,7 @@ class Player(pg.sprite.Sprite):
         '''Draws a bounding rectangle around the image'''
         pg.draw.rect(win, (255, 0, 0), self.rect, 1)
 
-    def update(self, current_time, keys, labels, flagpole, *groups):
+    def update(self, current_time, keys, particles, flagpole, camera, *groups):
         '''Updates the player'''
         if not self.is_transition:
             if self.state == JUMPING:
@@ -287,7 +302,7 @@ class Player(pg.sprite.Sprite):
             self.acc = vec(0, self.gravity)
             self.is_jumping = self.vel.y != 0 
 
-            self.__check_actions(keys, current_time)
+            self.__check_actions(keys, current_time, camera)
             self.__set_acc_and_vel() 
             self.__update_image_index()
             self.__handle_images(current_time)
@@ -299,10 +314,10 @@ class Player(pg.sprite.Sprite):
             self.rect = self.image.get_rect()
             # Sets the midbottom of the image rectangle to the player position
             self.rect.midbottom = self.pos
-            self.mask = pg.mask.from_surface(self.image)
+            self.mask = get_mask(self.image)
 
             # Check for collisions
-            self.__move_and_collide(labels, flagpole, *groups)
+            self.__move_and_collide(particles, flagpole, camera, *groups)
 
             # Check that mario doesnt fall off the map
             if self.rect.top >= HEIGHT:
@@ -328,7 +343,7 @@ class Player(pg.sprite.Sprite):
 
         self.__check_invincible_timer()
         self.rect.midbottom = self.pos
-        self.current_timer = pg.time.get_ticks()
+        self.current_timer = self.clock.now()
 
     def __check_invincible_timer(self):
         if not self.has_star and self.current_timer - self.invincible_begin_timer >= 2000:
@@ -569,33 +584,37 @@ class Player(pg.sprite.Sprite):
             self.star_timer = current_time
             self.image = frames[self.dir][self.image_index]
 
-    def __move_and_collide(self, labels, flagpole, powerups, boxes, pipes, ground_blocks, enemies):
+    def __move_and_collide(self, particles, flagpole, camera, powerups, solids, boxes, pipes, ground_blocks, enemies):
         '''Updates Mario's position and handles collisions'''
 
         def coll_group(*groups):
             return (pg.sprite.spritecollideany(self, group) for group in groups)
 
+        def coll_all():
+            # Static geometry goes through the grid, moving sprites are checked directly
+            return (*solids.collide_any(self, boxes, pipes, ground_blocks), *coll_group(flagpole, enemies))
+
         # X movement
         self.pos.x += self.vel.x
-        if self.pos.x < 20:
-            self.pos.x = 20
+        if self.pos.x < camera.rect.left + 20:
+            self.pos.x = camera.rect.left + 20
         self.rect.centerx = self.pos.x
 
-        collisions = coll_group(boxes, pipes, ground_blocks, flagpole, enemies)
-        self.__adjust_after_x_collisions(labels, *collisions)
+        collisions = coll_all()
+        self.__adjust_after_x_collisions(particles, *collisions)
 
         # Y movement
         self.pos.y += self.vel.y
         self.rect.bottom = self.pos.y
 
-        collisions = coll_group(boxes, pipes, ground_blocks, flagpole, enemies)
-        self.__adjust_after_y_collisions(labels, *collisions)
+        collisions = coll_all()
+        self.__adjust_after_y_collisions(particles, *collisions)
 
         # Powerup collision
         powerup, = coll_group(powerups)
-        self.__adjust_after_powerup_collisions(labels, powerup)
+        self.__adjust_after_powerup_collisions(particles, powerup)
 
-    def __adjust_after_x_collisions(self, labels, box, pipe, ground, flagpole, enemy):
+    def __adjust_after_x_collisions(self, particles, box, pipe, ground, flagpole, enemy):
         '''Makes adjustments after Mario's x collisions'''
         def adjust_after_solid_collision(sprite):
             if self.vel.x > 0:              
@@ -612,7 +631,7 @@ class Player(pg.sprite.Sprite):
             adjust_after_solid_collision(box)
         if flagpole and not isinstance(flagpole, QuestionBox):
             adjust_after_solid_collision(flagpole)
-            self.transition_timer = pg.time.get_ticks()
+            self.transition_timer = self.clock.now()
             self.is_transition = True
             self.state = POLE_SLIDING
 
@@ -624,24 +643,23 @@ class Player(pg.sprite.Sprite):
                     enemy.vel.x = 0.3 * self.vel.x 
 
                     # Create score label
-                    score_label = lbl.ScoreLabel('1000', enemy.rect.centerx, enemy.rect.centery)
-                    labels.append(score_label)
+                    particles.score('1000', enemy.rect.centerx, enemy.rect.centery)
                     self.score += 1000
                     self.hit_enemy_sound.play()
                 elif self.is_large and self.pow == NO_POW and self.vel.y < 0 and not self.is_invincible:
                     self.state = LARGE_TO_SMALL
-                    self.transition_timer = pg.time.get_ticks()
+                    self.transition_timer = self.clock.now()
                     self.is_transition = True
                     self.shrink_sound.play()
                 elif self.pow == FIRE and self.vel.y < 0 and not self.is_invincible:
                     self.state = FIRE_TO_LARGE
-                    self.transition_timer = pg.time.get_ticks()
+                    self.transition_timer = self.clock.now()
                     self.is_transition = True
                     self.shrink_sound.play()
                 elif not self.is_large and not self.is_invincible:
                     self.lives -= 1
 
-    def __adjust_after_y_collisions(self, labels, box, pipe, ground, flagpole, enemy):
+    def __adjust_after_y_collisions(self, particles, box, pipe, ground, flagpole, enemy):
         '''Makes adjustments after Mario's y collisions'''
         def adjust_after_solid_collision(sprite, box_hit=None):
             if self.vel.y > 0:
@@ -674,7 +692,7 @@ class Player(pg.sprite.Sprite):
             adjust_after_solid_collision(box, 'box')
         if flagpole and not isinstance(flagpole, QuestionBox):
             adjust_after_solid_collision(flagpole)
-            self.transition_timer = pg.time.get_ticks()
+            self.transition_timer = self.clock.now()
             self.is_transition = True
             self.state = POLE_SLIDING
 
@@ -693,33 +711,32 @@ class Player(pg.sprite.Sprite):
                             self.vel.y = GOOMBA_JUMP_VEL_Y
 
                             # Create score label
-                            score_label = lbl.ScoreLabel('1000', enemy.rect.centerx, enemy.rect.centery)
-                            labels.append(score_label)
+                            particles.score('1000', enemy.rect.centerx, enemy.rect.centery)
                             self.score += 1000
 
-                        enemy.kill_timer = pg.time.get_ticks()
+                        enemy.kill_timer = self.clock.now()
                         enemy.state = DYING
                 elif self.is_large and self.pow == NO_POW:
                     self.state = LARGE_TO_SMALL
-                    self.transition_timer = pg.time.get_ticks()
+                    self.transition_timer = self.clock.now()
                     self.is_transition = True
                     self.shrink_sound.play()
                 elif self.pow == FIRE:
                     self.state = FIRE_TO_LARGE
-                    self.transition_timer = pg.time.get_ticks()
+                    self.transition_timer = self.clock.now()
                     self.is_transition = True
                     self.shrink_sound.play()               
             
             self.pos.y = self.rect.bottom
 
-    def __adjust_after_powerup_collisions(self, labels, powerup):
+    def __adjust_after_powerup_collisions(self, particles, powerup):
         '''Checks for collisions with powerups'''
         if powerup and pg.sprite.collide_mask(self, powerup):
             powerup.kill()
             if isinstance(powerup, Mushroom):
                 if not self.is_large:
                     self.is_large = True
-                    self.transition_timer = pg.time.get_ticks()  # Set the time of getting mushroom
+                    self.transition_timer = self.clock.now()  # Set the time of getting mushroom
                     self.state = GROWING_LARGE
                     self.is_transition = True
                     self.grow_large_sound.play()
@@ -727,20 +744,19 @@ class Player(pg.sprite.Sprite):
                 if self.pow != FIRE:
                     self.pow = FIRE
                     self.is_large = True
-                    self.transition_timer = pg.time.get_ticks()
+                    self.transition_timer = self.clock.now()
                     self.is_transition = True
                     self.state = LARGE_TO_FIRE
                     self.grow_large_sound.play()
             elif isinstance(powerup, Star):
                 self.has_star = True     
-                self.invincible_begin_timer = pg.time.get_ticks() 
+                self.invincible_begin_timer = self.clock.now() 
                 self.song_is_playing = True
-                pg.mixer.music.load(MUSIC['star_music'])
-                pg.mixer.music.play(3, 0.0)
+                MUSIC_PLAYER.load(MUSIC['star_music'])
+                MUSIC_PLAYER.play(3, 0.0)
 
             # Add 1000 points to score and spawn label
-            score_label = lbl.ScoreLabel('1000', powerup.rect.x, powerup.rect.y)
-            labels.append(score_label)
+            particles.score('1000', powerup.rect.x, powerup.rect.y)
             self.score += 1000
 
     def __animation_delay(self):
@@ -792,9 +808,9 @@ class Player(pg.sprite.Sprite):
                 self.__star_animation(current_time, 30)
             elif current_time - self.invincible_begin_timer < 12000:
                 self.__star_animation(current_time, 100)
-                if not pg.mixer.music.get_busy():
-                    pg.mixer.music.load(MUSIC['star_running_out'])
-                    pg.mixer.music.play(0, 0.0)
+                if not MUSIC_PLAYER.get_busy():
+                    MUSIC_PLAYER.load(MUSIC['star_running_out'])
+                    MUSIC_PLAYER.play(0, 0.0)
             else:
                 self.has_star = False
                 self.is_invincible = False
@@ -802,14 +818,14 @@ class Player(pg.sprite.Sprite):
         else:
             self.image = self.normal_small_frames[self.dir][self.image_index]
         
-    def __check_actions(self, keys, current_time):
+    def __check_actions(self, keys, current_time, camera):
         '''Check's key events'''
         
         if not keys[pg.K_SPACE]:
             self.allow_jump = True
 
         # Check walking
-        if keys[pg.K_LEFT] and self.rect.left > 10:
+        if keys[pg.K_LEFT] and self.rect.left > camera.rect.left + 10:
             # Walk left
             if self.vel.x > 0 and self.state != JUMPING and self.state != FALLING:
                 self.state = SLIDING
@@ -819,7 +835,7 @@ class Player(pg.sprite.Sprite):
                 self.dir = LEFT
             self.is_walking = True
 
-        elif keys[pg.K_RIGHT] and self.rect.right < WIDTH - 10:
+        elif keys[pg.K_RIGHT] and self.rect.right < camera.rect.right - 10:
             # Walk right
             if self.vel.x < 0 and self.state != JUMPING and self.state != FALLING:
                 self.state = SLIDING
@@ -849,7 +865,7 @@ class Player(pg.sprite.Sprite):
         if keys[pg.K_f] and self.pow == FIRE:
             # Mario can only shoot a fireball every 300 ms     
             if current_time - self.fireball_shot > 300:
-                self.fireball_shot = pg.time.get_ticks()
+                self.fireball_shot = self.clock.now()
                 if self.dir == RIGHT:
                     self.fireballs.add(Fireball(self.rect.right, self.rect.centery, self.dir))
                 else:
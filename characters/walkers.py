@@ -0,0 +1,350 @@
+'''Simulates the walking enemies of a level together as arrays'''
+
+import numpy as np
+
+# Local imports
+from characters.entity_constants import *
+from settings import HEIGHT, ENEMY_INTERACTION_MARGIN
+from tools import get_mask
+
+GONE = -1       # State of rows whose goomba has died or been unloaded
+DYING_TIME = 800    # ms a stomped goomba stays on screen
+
+
+# One array per field, x and y are the midbottom. rect_image is the image the rect was last sized
+# for and mask_image the one the mask was made from, only walking goombas update their mask.
+# prev_x and prev_y are x and y before the last update, for drawing between updates
+FIELDS = (
+    ('x', np.float64), ('y', np.float64), ('prev_x', np.float64), ('prev_y', np.float64),
+    ('vel_x', np.float64), ('vel_y', np.float64),
+    ('state', np.int8), ('image_count', np.int64), ('kill_timer', np.int64),
+    ('image', np.int8), ('rect_image', np.int8), ('mask_image', np.int8)
+)
+
+
+def _round(values):
+    '''Rounds half away from zero to ints, the way pygame stores floats in a Rect'''
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+class WalkerManager:
+    '''Every goomba of a level as rows of arrays, moved together each update.
+
+    The arrays hold the state that changes: position, velocity, state,
+    animation counter and kill timer. update() walks, squashes and flips
+    every goomba in the activation window with array operations, collisions
+    with the static solids included. tests/test_walkers.py holds the per
+    sprite version it has to match.
+
+    The Goomba sprites are only brought up to date when something needs
+    them: materialise() writes the rows overlapping some rects into their
+    sprites and returns them, for drawing and for Mario and fireballs to
+    collide with. absorb() reads back what those collisions changed. Rows
+    keep the order the goombas were added in, like the enemies group.
+    '''
+    def __init__(self, capacity=64):
+        self.sprites = []
+        self.rows = {}          # Goomba -> row
+        self.count = 0
+        self.gone = 0           # Rows of dead goombas not compacted away yet
+        self.images = None
+        self.sizes = None
+        for name, dtype in FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __grow(self, capacity):
+        for name, dtype in FIELDS:
+            array = np.zeros(capacity, dtype=dtype)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    def __len__(self):
+        return self.count - self.gone
+
+    def clear(self):
+        '''Forgets every goomba'''
+        self.sprites = []
+        self.rows = {}
+        self.count = 0
+        self.gone = 0
+
+    def add(self, *goombas):
+        '''Takes over the simulation of goombas, starting from their current state'''
+        if self.count + len(goombas) > len(self.x):
+            self.__grow(max(2 * len(self.x), self.count + len(goombas)))
+        for goomba in goombas:
+            self.__set_images(goomba)
+            row = self.count
+            self.count += 1
+            self.sprites.append(goomba)
+            self.rows[goomba] = row
+            self.__load(goomba, row)
+
+    def __set_images(self, goomba):
+        if self.images is None:
+            self.images = goomba.images
+            self.sizes = np.array([image.get_size() for image in self.images], dtype=np.int64)
+
+    def __load(self, goomba, row):
+        '''Copies the state of goomba into row'''
+        self.x[row], self.y[row] = goomba.pos
+        self.prev_x[row], self.prev_y[row] = goomba.pos
+        self.vel_x[row], self.vel_y[row] = goomba.vel
+        self.state[row] = goomba.state
+        self.image_count[row] = goomba.image_count
+        self.kill_timer[row] = goomba.kill_timer
+        self.image[row] = self.images.index(goomba.image)
+        size = goomba.rect.size
+        self.rect_image[row] = next(i for i, image in enumerate(self.images) if image.get_size() == size)
+        mask = goomba.mask
+        self.mask_image[row] = next(
+            (i for i, image in enumerate(self.images) if get_mask(image) is mask), self.image[row]
+        )
+
+    def live(self):
+        '''Returns the rows of the goombas that are still simulated'''
+        return np.flatnonzero(self.state[:self.count] != GONE)
+
+    def set_rows(self, goombas, arrays):
+        '''Replaces every row with the field arrays saved from live(), goombas are the goombas of the rows'''
+        count = len(goombas)
+        self.clear()
+        if count > len(self.x):
+            self.__grow(count)
+        for name, _ in FIELDS:
+            getattr(self, name)[:count] = arrays[name]
+        self.count = count
+        self.sprites = list(goombas)
+        self.rows = {goomba: row for row, goomba in enumerate(self.sprites)}
+        if goombas:
+            self.__set_images(goombas[0])
+
+    def remove(self, *sprites):
+        '''Stops simulating sprites, anything that is not a managed goomba is ignored'''
+        for sprite in sprites:
+            row = self.rows.pop(sprite, None)
+            if row is not None and self.state[row] != GONE:
+                self.state[row] = GONE
+                self.gone += 1
+        self.__compact()
+
+    def __compact(self):
+        '''Drops the rows of dead goombas once they are half of all rows'''
+        if self.gone * 2 <= self.count:
+            return
+        keep = self.state[:self.count] != GONE
+        n = int(keep.sum())
+        for name, _ in FIELDS:
+            array = getattr(self, name)
+            array[:n] = array[:self.count][keep]
+        self.sprites = [sprite for sprite, k in zip(self.sprites, keep.tolist()) if k]
+        self.rows = {sprite: row for row, sprite in enumerate(self.sprites)}
+        self.count = n
+        self.gone = 0
+
+    def __rects(self, rows=slice(None)):
+        '''Returns left, top, right, bottom of the rects of rows'''
+        size = self.sizes[self.rect_image[:self.count][rows]]
+        left = _round(self.x[:self.count][rows]) - size[:, 0] // 2
+        bottom = _round(self.y[:self.count][rows])
+
+        return left, bottom - size[:, 1], left + size[:, 0], bottom
+
+    def __overlapping(self, rects):
+        '''Returns the live rows whose rect overlaps any of rects'''
+        n = self.count
+        if not n or not rects:
+            return np.zeros(0, dtype=np.intp)
+        left, top, right, bottom = self.__rects()
+        hit = np.zeros(n, dtype=bool)
+        for rect in rects:
+            hit |= (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+
+        return np.flatnonzero(hit & (self.state[:n] != GONE))
+
+    def update(self, current_time, camera, solids, boxes, pipes, ground_blocks):
+        '''Wakes up the goombas in the activation window and moves them one update'''
+        n = self.count
+        if not n:
+            return
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        state = self.state[:n]
+        inside = np.zeros(n, dtype=bool)
+        inside[self.__overlapping([camera.active_rect])] = True
+        state[inside & (state == DEACTIVATED)] = ACTIVATED
+
+        dying = np.flatnonzero(inside & (state == DYING))
+        flipped = np.flatnonzero(inside & (state == FLIPPED))
+        walking = np.flatnonzero(inside & (state != DYING) & (state != FLIPPED) & (state != GONE))
+
+        dead = self.__update_dying(dying, current_time)
+        self.__update_flipped(flipped)
+        self.__update_walking(walking, camera, solids, (boxes, pipes, ground_blocks))
+
+        updated = np.concatenate((dying, flipped, walking))
+        dead = np.union1d(dead, updated[self.y[updated] >= HEIGHT])
+        for row in dead.tolist():
+            goomba = self.sprites[row]
+            self.__store(goomba, row)
+            goomba.kill()
+            self.rows.pop(goomba, None)
+            self.state[row] = GONE
+            self.gone += 1
+        self.__compact()
+
+    def __update_dying(self, rows, current_time):
+        '''Stomped goombas stay flat for a while, returns the rows that are done'''
+        self.vel_x[rows] = 0
+        self.vel_y[rows] = 0
+        # The rect keeps the size of the image before this update
+        self.rect_image[rows] = self.image[rows]
+        delta = current_time - self.kill_timer[rows]
+        self.image[rows[(delta >= 0) & (delta < DYING_TIME)]] = 2
+
+        return rows[delta >= DYING_TIME]
+
+    def __update_flipped(self, rows):
+        '''Flipped goombas fall off the screen without colliding'''
+        self.image[rows] = 3
+        self.vel_y[rows] += GOOMBA_FALL_GRAVITY
+        self.x[rows] += self.vel_x[rows]
+        self.y[rows] += self.vel_y[rows]
+
+    def __update_walking(self, rows, camera, solids, groups):
+        if not len(rows):
+            return
+        vel_x = self.vel_x[rows]
+        vel_y = self.vel_y[rows]
+        vel_y = np.where(vel_y < MAX_VEL_Y, vel_y + GRAVITY, vel_y)
+
+        image = (self.image_count[rows] // 10 % 2).astype(np.int8)
+        self.image_count[rows] += 1
+        self.image[rows] = image
+        self.rect_image[rows] = image
+        self.mask_image[rows] = image
+        width, height = self.sizes[image].T
+
+        # The rect is placed on the position before moving, then moved on x
+        x = self.x[rows] + vel_x
+        bottom = _round(self.y[rows])
+        left = _round(x) - width // 2
+        top = bottom - height
+
+        solid_rects, solid_groups = self.__solids(camera, solids, groups)
+        hits = self.__hits(left, top, left + width, bottom, solid_rects, solid_groups, len(groups))
+        for hit in hits:
+            found = hit >= 0
+            moving_right = found & (vel_x > 0)
+            moving_left = found & ~(vel_x > 0)
+            left = np.where(moving_right, solid_rects[hit, 0] - width, left)
+            left = np.where(moving_left, solid_rects[hit, 2], left)
+            vel_x = np.where(moving_right, -ENEMY_VEL_X, np.where(moving_left, ENEMY_VEL_X, vel_x))
+            x = np.where(found, left + width // 2, x)
+
+        y = self.y[rows] + vel_y
+        bottom = _round(y)
+        top = bottom - height
+        hits = self.__hits(left, top, left + width, bottom, solid_rects, solid_groups, len(groups))
+        for hit in hits:
+            found = hit >= 0
+            falling = found & (vel_y > 0)
+            rising = found & ~(vel_y > 0)
+            bottom = np.where(falling, solid_rects[hit, 1], bottom)
+            bottom = np.where(rising, solid_rects[hit, 3] + height, bottom)
+            vel_y = np.where(falling, 0, vel_y)
+            y = np.where(found, bottom, y)
+
+        self.x[rows] = x
+        self.y[rows] = y
+        self.vel_x[rows] = vel_x
+        self.vel_y[rows] = vel_y
+
+    def __solids(self, camera, solids, groups):
+        '''Returns the rects of the solids around the activation window and the group of each.
+
+        They are sorted like the grid orders them, so the first hit is the one collide_any finds.
+        '''
+        # Goombas at the edge of the window stick out of it by up to their size
+        reach = 2 * int(self.sizes.max())
+        found = []
+        for sprite in solids.query(camera.active_rect.inflate(reach, reach)):
+            for i, group in enumerate(groups):
+                if group.has_internal(sprite):
+                    found.append((solids.order[sprite], i, tuple(sprite.rect)))
+                    break
+        found.sort()
+        rects = np.array([rect for _, _, rect in found], dtype=np.int64).reshape(-1, 4)
+        rects[:, 2:] += rects[:, :2]
+
+        return rects, np.array([group for _, group, _ in found], dtype=np.int64)
+
+    @staticmethod
+    def __hits(left, top, right, bottom, solid_rects, solid_groups, num_groups):
+        '''Returns per group the index of the first solid each rect overlaps, -1 for none'''
+        hits = []
+        for group in range(num_groups):
+            columns = np.flatnonzero(solid_groups == group)
+            if not len(columns):
+                hits.append(np.full(len(left), -1))
+                continue
+            s = solid_rects[columns]
+            overlap = (
+                (left[:, None] < s[:, 2]) & (right[:, None] > s[:, 0]) &
+                (top[:, None] < s[:, 3]) & (bottom[:, None] > s[:, 1])
+            )
+            first = overlap.argmax(axis=1)
+            hits.append(np.where(overlap.any(axis=1), columns[first], -1))
+
+        return hits
+
+    def __store(self, goomba, row):
+        '''Writes row into its goomba'''
+        goomba.pos.update(self.x[row], self.y[row])
+        goomba.vel.update(self.vel_x[row], self.vel_y[row])
+        goomba.state = int(self.state[row])
+        goomba.image_count = int(self.image_count[row])
+        goomba.kill_timer = int(self.kill_timer[row])
+        goomba.image = self.images[self.image[row]]
+        goomba.mask = get_mask(self.images[self.mask_image[row]])
+        goomba.rect = self.images[self.rect_image[row]].get_rect()
+        goomba.rect.midbottom = goomba.pos
+
+    def materialise(self, rects):
+        '''Brings the goombas overlapping any of rects up to date and returns them in order'''
+        goombas = []
+        for row in self.__overlapping(rects).tolist():
+            goomba = self.sprites[row]
+            self.__store(goomba, row)
+            goombas.append(goomba)
+
+        return goombas
+
+    def previous(self, goombas):
+        '''Returns {goomba: midbottom of its rect before the last update} for materialised goombas'''
+        rows = [self.rows[goomba] for goomba in goombas]
+        xs = _round(self.prev_x[rows]).tolist()
+        ys = _round(self.prev_y[rows]).tolist()
+
+        return dict(zip(goombas, zip(xs, ys)))
+
+    def near(self, *sprites):
+        '''Materialises the goombas sprites could run into this update'''
+        margin = ENEMY_INTERACTION_MARGIN
+        return self.materialise([sprite.rect.inflate(margin, margin) for sprite in sprites])
+
+    def absorb(self, goombas):
+        '''Reads back what collisions changed in materialised goombas'''
+        for goomba in goombas:
+            row = self.rows.get(goomba)
+            if row is not None:
+                self.state[row] = goomba.state
+                self.vel_x[row], self.vel_y[row] = goomba.vel
+                self.kill_timer[row] = goomba.kill_timer
+
+    def store(self, sprites):
+        '''Brings the managed goombas among sprites up to date'''
+        for sprite in sprites:
+            row = self.rows.get(sprite)
+            if row is not None:
+                self.__store(sprite, row)
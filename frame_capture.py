@@ -0,0 +1,96 @@
+'''Saves drawn frames on a background thread so capturing does not stall the game'''
+
+import os
+import queue
+import threading
+
+import pygame as pg
+
+# Local imports
+from settings import CAPTURE_QUEUE_SIZE
+
+DROP, BLOCK = 'drop', 'block'
+
+
+class FrameCapture:
+    '''Copies finished frames into a bounded queue that a worker thread writes out.
+
+    Frames go to directory as numbered PNGs, or as raw RGB bytes to stream
+    (a binary file such as the stdin of an encoder) when one is given.
+    When the queue is full the drop policy skips the frame and counts it
+    in dropped, the block policy waits for the worker to catch up. Frame
+    numbers count dropped frames too, so gaps in the files show the drops.
+
+    If writing fails the worker keeps the error and throws away the frames
+    still queued, the next capture() or close() raises it.
+    '''
+    def __init__(self, directory=None, stream=None, policy=DROP, queue_size=CAPTURE_QUEUE_SIZE):
+        if policy not in (DROP, BLOCK):
+            raise ValueError(f'unknown capture policy {policy!r}')
+        if (directory is None) == (stream is None):
+            raise ValueError('capture needs either a directory or a stream')
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.stream = stream
+        self.policy = policy
+        self.frames = 0         # Frames offered to the capture
+        self.written = 0
+        self.dropped = 0
+        self.error = None       # What stopped the worker from writing
+        self.queue = queue.Queue(queue_size)
+        self.thread = threading.Thread(target=self.__write_frames, daemon=True)
+        self.thread.start()
+
+    def capture(self, surface):
+        '''Queues a copy of surface, returns False if it was dropped'''
+        if self.error is not None:
+            raise self.error
+        index = self.frames
+        self.frames += 1
+        if self.policy == DROP and self.queue.full():
+            self.dropped += 1
+            return False
+
+        frame = (index, surface.get_size(), pg.image.tobytes(surface, 'RGB'))
+        if self.policy == BLOCK:
+            self.queue.put(frame)
+            return True
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        return True
+
+    def __write_frames(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                # Keeps taking frames so a blocked capture() gets to see the error
+                continue
+            index, size, data = frame
+            try:
+                if self.stream is not None:
+                    self.stream.write(data)
+                else:
+                    image = pg.image.frombuffer(data, size, 'RGB')
+                    pg.image.save(image, os.path.join(self.directory, f'frame_{index:06d}.png'))
+            except Exception as error:
+                self.error = error
+                continue
+            self.written += 1
+
+    def close(self):
+        '''Writes out the queued frames and stops the worker'''
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+        if self.stream is not None:
+            self.stream.flush()
@@ -0,0 +1,50 @@
+'''Clocks that tell the game what time it is'''
+
+import pygame as pg
+
+# Local imports
+from settings import FPS
+
+
+class RealClock:
+    '''Reads the time from pygame, so game time follows the wall clock'''
+    def tick(self):
+        '''Nothing to do, real time moves on by itself'''
+
+    def now(self):
+        '''Returns the milliseconds since pygame was initialized'''
+        return pg.time.get_ticks()
+
+    def get_state(self):
+        '''Returns the current time, for snapshots'''
+        return pg.time.get_ticks()
+
+    def set_state(self, state):
+        '''Real time can not be set back, snapshots shift their timers instead'''
+
+
+class SimulatedClock:
+    '''A clock that only moves when it is ticked.
+
+    Every tick is one update at the given rate, so a run takes the same game
+    time however fast it is stepped.
+    '''
+    def __init__(self, rate=FPS):
+        self.rate = rate
+        self.ticks = 0
+
+    def tick(self):
+        '''Advances the clock by one update'''
+        self.ticks += 1
+
+    def now(self):
+        '''Returns the milliseconds of game time that have passed'''
+        return self.ticks * 1000 // self.rate
+
+    def get_state(self):
+        '''Returns the tick count, for snapshots'''
+        return self.ticks
+
+    def set_state(self, state):
+        '''Sets the clock back (or forward) to a state from get_state()'''
+        self.ticks = state
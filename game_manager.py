@@ -1,3 +1,7 @@
+import argparse
+import sys
+import time
+
 from settings import START_SCREEN
 from game_setup import *
 from screens.game_over_screen import GameOverScreen
@@ -5,37 +9,82 @@ from screens.start_screen import StartScreen
 from screens.loading_screen import LoadingScreen
 from screens.level1 import Level1
 from characters.mario import Player
+from game_clock import RealClock, SimulatedClock
+from input_replay import InputRecorder, InputPlayer
+from rewind import RewindBuffer
+from frame_capture import FrameCapture, DROP, BLOCK
 
 class GameManager:
-    '''Manages the different game screens and contains the game loop'''
-    def __init__(self):
+    '''Manages the different game screens and contains the game loop.
+
+    Screens are updated FPS times a second and drawn as often as MAX_RENDER_FPS allows.
+    '''
+    def __init__(self, uncapped=HEADLESS, game_clock=None, recorder=None, replay=None, capture=None,
+                 dirty_rects=DIRTY_RECTS):
+        self.uncapped = uncapped        # One update per loop and no sleeping, for batch simulation
+        self.recorder = recorder        # Stores the keys of every update
+        self.replay = replay            # Keys played instead of the keyboard, the game stops after them
+        self.capture = capture          # Saves one frame per update, see __update
+        self.dirty_rects = dirty_rects  # Only redraw and push the regions that changed, see __draw
+        self.drawn_screen = None        # Screen of the last drawn frame
+        # The time every screen and entity reads. Uncapped runs, recordings and replays
+        # use a simulated clock that moves one update per step, so they are deterministic
+        if game_clock is None:
+            if replay is not None:
+                game_clock = SimulatedClock(replay.rate)
+            elif uncapped or recorder is not None:
+                game_clock = SimulatedClock()
+            else:
+                game_clock = RealClock()
+        self.game_clock = game_clock
         self.win = WIN
         self.clock = pg.time.Clock()
         self.running = True
         self.current_time = 0
         self.keys = pg.key.get_pressed()
-        self.player = Player()
+        self.player = Player(self.game_clock)
+        # Batch runs have no one to rewind for
+        self.rewind = RewindBuffer() if REWIND_BUDGET_MB and not uncapped else None
         self.screen_dict = {
             START_SCREEN: StartScreen(),
             LOADING_SCREEN: LoadingScreen(),
             GAME_OVER_SCREEN: GameOverScreen(),
-            LEVEL_SCREEN: Level1(self.player)
+            LEVEL_SCREEN: Level1(self.player, self.game_clock, self.rewind)
         }
         self.screen = self.screen_dict[START_SCREEN]
 
     def set_level(self, level):
         '''Called when user selects level'''
         if level == LEVEL_1:
-            self.screen_dict[LEVEL_SCREEN] = Level1()
+            self.screen_dict[LEVEL_SCREEN] = Level1(self.player, self.game_clock, self.rewind)
 
     def run(self):
-        '''Runs the game loop'''
+        '''Runs the game loop, drawing between updates alpha of the way from the last to the next'''
+        step = 1 / FPS
+        lag = 0
+        previous = time.perf_counter()
         while self.running:
             self.__events()
-            self.__update()
-            self.__draw()
-            self.clock.tick(FPS)
-            pg.display.set_caption(f'{TITLE}  {round(self.clock.get_fps(), 3)} FPS')
+            if self.uncapped:
+                self.__update()
+                alpha = 1
+            else:
+                now = time.perf_counter()
+                lag += min(now - previous, MAX_FRAME_TIME)
+                previous = now
+                # Catch up on the updates that are due since the last frame
+                while lag >= step:
+                    self.__update()
+                    lag -= step
+                alpha = lag / step
+
+            if HEADLESS:
+                self.clock.tick()
+            else:
+                if self.capture is None:
+                    self.__draw(alpha)
+                self.clock.tick(0 if self.uncapped else MAX_RENDER_FPS)
+                pg.display.set_caption(f'{TITLE}  {round(self.clock.get_fps(), 3)} FPS')
 
     def __events(self):
         '''Checks events'''
@@ -49,7 +98,21 @@ class GameManager:
                 self.keys = pg.key.get_pressed()
 
     def __update(self):
-        self.current_time = pg.time.get_ticks()
+        '''Runs one update of the current screen.
+
+        A capture is drawn here without interpolation, so the captured video has
+        FPS frames a second on any machine and the window shows the captured frames.
+        '''
+        if self.replay is not None:
+            if self.replay.done:
+                self.running = False
+                return
+            self.keys = self.replay.next_keys()
+        if self.recorder is not None:
+            self.recorder.record(self.keys)
+
+        self.game_clock.tick()
+        self.current_time = self.game_clock.now()
 
         # Check to switch screen
         if not self.screen.running:
@@ -58,13 +121,45 @@ class GameManager:
         
         self.screen.update(self.current_time, self.keys, player_lives=self.player.lives)
 
-    def __draw(self):
-        self.screen.draw(self.win)
-        pg.display.update()
+        if self.capture is not None:
+            self.__draw()
+            self.capture.capture(self.win)
+
+    def __draw(self, alpha=1):
+        '''Draws the screen, a dirty draw only pushes the changed regions, switching screens draws it whole'''
+        dirty = self.dirty_rects and self.screen is self.drawn_screen
+        self.drawn_screen = self.screen
+        rects = self.screen.draw(self.win, alpha=alpha, dirty=dirty)
+        if rects is None:
+            pg.display.update()
+        elif rects:
+            pg.display.update(rects)
 
 def main():
-    g = GameManager()
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument('--record', metavar='FILE', help='save the keys of every update to FILE')
+    parser.add_argument('--replay', metavar='FILE', help='play the keys recorded in FILE')
+    parser.add_argument('--capture', metavar='DIR', help='save a frame of every update as a PNG in DIR, - writes raw RGB frames to stdout')
+    parser.add_argument('--capture-policy', choices=(DROP, BLOCK), default=DROP, help='what to do when frames are drawn faster than they are saved')
+    parser.add_argument('--dirty-rects', action='store_true', default=DIRTY_RECTS, help='only redraw the parts of the window that changed')
+    args = parser.parse_args()
+
+    recorder = InputRecorder() if args.record else None
+    replay = InputPlayer.load(args.replay) if args.replay else None
+    capture = None
+    if args.capture == '-':
+        capture = FrameCapture(stream=sys.stdout.buffer, policy=args.capture_policy)
+    elif args.capture:
+        capture = FrameCapture(args.capture, policy=args.capture_policy)
+
+    g = GameManager(recorder=recorder, replay=replay, capture=capture, dirty_rects=args.dirty_rects)
     g.run()
+
+    if recorder:
+        recorder.save(args.record)
+    if capture is not None:
+        capture.close()
+        print(f'{capture.written} frames captured, {capture.dropped} dropped', file=sys.stderr)
             
     pg.quit()
 
@@ -1,16 +1,26 @@
 '''Initializes pygame and loads resources'''
 
+import os
+
 import pygame as pg
 
 # Local imports
 from settings import *
-from tools import load_files
+from tools import load_files, SilentSound
 
 # Initialize pygame
-pg.mixer.pre_init(44100, -16, 2, 2048)
-pg.mixer.init()
-pg.font.init()
-pg.init()
+if HEADLESS:
+    # Dummy SDL drivers, must be set before the display is initialized
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pg.init()
+    # Sounds are never decoded or played, so the mixer is not needed
+    pg.mixer.quit()
+else:
+    pg.mixer.pre_init(44100, -16, 2, 2048)
+    pg.mixer.init()
+    pg.font.init()
+    pg.init()
 
 # Events
 pg.event.set_allowed([pg.KEYDOWN, pg.KEYUP, pg.QUIT])
@@ -26,5 +36,8 @@ MUSIC  = load_files(MUSIC_PATH, 'music', ('.wav', '.ogg', '.mdi', '.mp3'))
 FONTS  = load_files(FONTS_PATH, 'font', ('.ttf'))
 DATA   = load_files(DATA_PATH, 'data', ('.json'))
 
+# Plays the music files, silent when there is no audio device
+MUSIC_PLAYER = SilentSound() if HEADLESS else pg.mixer.music
+
 # Set icon
 pg.display.set_icon(IMAGES['icon'])
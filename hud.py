@@ -0,0 +1,74 @@
+'''Bitmap font rendering for HUD text that changes during play'''
+
+import string
+from functools import lru_cache
+
+import pygame as pg
+
+# Local imports
+from settings import WHITE
+from tools import get_font
+
+GLYPHS = string.digits + string.ascii_letters + ' '
+
+
+class GlyphFont:
+    '''A font whose glyphs are rendered once into an atlas.
+
+    Strings are composed by blitting glyphs from the atlas, so no font
+    rasterisation happens after the font is created.
+    '''
+    def __init__(self, font_file, size, color=WHITE, chars=GLYPHS):
+        self.font = get_font(font_file, size)
+        self.color = color
+        self.height = self.font.get_height()
+
+        rendered = [self.font.render(char, 1, color) for char in chars]
+        width = sum(img.get_width() for img in rendered)
+        self.atlas = pg.Surface((max(width, 1), self.height), pg.SRCALPHA)
+        self.glyphs = {}
+        x = 0
+        for char, img in zip(chars, rendered):
+            # Glyphs never overlap, so max blending simply copies them over
+            self.atlas.blit(img, (x, 0), special_flags=pg.BLEND_RGBA_MAX)
+            self.glyphs[char] = self.atlas.subsurface((x, 0, img.get_width(), self.height))
+            x += img.get_width()
+
+    def __glyph(self, char):
+        '''Returns the glyph of a char, rendering it first if it is not in the atlas'''
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self.font.render(char, 1, self.color)
+
+        return glyph
+
+    def render(self, text):
+        '''Returns a new surface with text composed from glyphs'''
+        glyphs = [self.__glyph(char) for char in text]
+        img = pg.Surface((max(sum(glyph.get_width() for glyph in glyphs), 1), self.height), pg.SRCALPHA)
+        x = 0
+        for glyph in glyphs:
+            img.blit(glyph, (x, 0), special_flags=pg.BLEND_RGBA_MAX)
+            x += glyph.get_width()
+
+        return img
+
+
+@lru_cache(maxsize=None)
+def glyph_font(font_file, size, color=WHITE):
+    '''Returns the shared GlyphFont for a font file, size and color'''
+    return GlyphFont(font_file, size, color)
+
+
+class HudText:
+    '''A HUD label that is only recomposed when its text changes'''
+    def __init__(self, font, text=''):
+        self.font = font
+        self.text = None
+        self.set(text)
+
+    def set(self, text):
+        '''Sets the text, recomposing the image only if it differs'''
+        if text != self.text:
+            self.text = text
+            self.image = self.font.render(text)
@@ -0,0 +1,93 @@
+'''Records the keys the game reads every update and plays them back'''
+
+import struct
+
+import pygame as pg
+
+# Local imports
+from settings import FPS
+
+# The keys the game reads, bit i of a tick is RECORDED_KEYS[i]. Rewinding (backspace) is last
+RECORDED_KEYS = (pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN, pg.K_SPACE, pg.K_f, pg.K_1, pg.K_BACKSPACE)
+KEY_BITS = {key: 1 << i for i, key in enumerate(RECORDED_KEYS)}
+
+# File header: magic and the update rate the input was recorded at
+HEADER = struct.Struct('<4sH')
+MAGIC = b'MINP'
+
+
+def pack_keys(keys):
+    '''Returns the bitmask of the recorded keys that are held in keys'''
+    mask = 0
+    for key, bit in KEY_BITS.items():
+        if keys[key]:
+            mask |= bit
+
+    return mask
+
+
+class KeyState:
+    '''Stands in for pg.key.get_pressed(), built from a tick's bitmask'''
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        return bool(self.mask & KEY_BITS.get(key, 0))
+
+
+class InputRecorder:
+    '''Collects one byte of held keys per update'''
+    def __init__(self, rate=FPS):
+        self.rate = rate
+        self.ticks = bytearray()
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def record(self, keys):
+        '''Adds the keys held during this update'''
+        self.ticks.append(pack_keys(keys))
+
+    def save(self, file):
+        '''Writes the recording to file'''
+        with open(file, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.rate))
+            f.write(self.ticks)
+
+
+class InputPlayer:
+    '''Feeds a recording back to the game, one tick per update'''
+    def __init__(self, ticks, rate=FPS):
+        self.rate = rate
+        self.ticks = bytes(ticks)
+        self.index = 0
+
+    @classmethod
+    def load(cls, file):
+        '''Reads a recording written by InputRecorder.save'''
+        with open(file, 'rb') as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f'{file} is not an input recording')
+        magic, rate = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f'{file} is not an input recording')
+
+        return cls(data[HEADER.size:], rate)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    @property
+    def done(self):
+        '''True once every tick has been played'''
+        return self.index >= len(self.ticks)
+
+    def next_keys(self):
+        '''Returns the keys of the next tick, nothing is held after the last one'''
+        if self.done:
+            return KeyState()
+        mask = self.ticks[self.index]
+        self.index += 1
+
+        return KeyState(mask)
@@ -1,28 +1,20 @@
-import pygame as pg
+'''Text images of the floating score labels'''
 
 # Local imports
 from game_setup import FONTS
 from settings import WHITE
+from tools import get_font
 
-# Pygame 2D Vector
-vec = pg.math.Vector2
 
+# Text images for score values, shared by every label
+_score_texts = {}
 
-class ScoreLabel:
-    '''A class for a floating score label'''
-    def __init__(self, value, x, y):
-        self.font = pg.font.Font(FONTS['ARCADECLASSIC'], 16)
-        self.value = value
-        self.start_timer = pg.time.get_ticks()
-        self.pos = vec(x, y)
-        self.text = self.font.render(self.value, 1, WHITE)
-        self.is_active = True
 
-    def update(self):
-        '''Updates the label's position'''
-        self.pos.y -= 2
-        self.text = self.font.render(self.value, 1, WHITE)
+def render_score(value):
+    '''Returns the text image for a score value, only rendered once per value'''
+    text = _score_texts.get(value)
+    if text is None:
+        font = get_font(FONTS['ARCADECLASSIC'], 16)
+        text = _score_texts[value] = font.render(value, 1, WHITE)
 
-    def draw(self, win):
-        '''Draws the label on to the screen'''
-        win.blit(self.text, (self.pos.x, self.pos.y))
+    return text
@@ -0,0 +1,73 @@
+'''Streams level chunks in and out around the camera'''
+
+# Local imports
+from settings import STREAM_AHEAD
+
+
+class LevelStream:
+    '''Instantiates level chunks just ahead of the camera and releases them behind it.
+
+    chunks is the x-ordered list of chunk dicts from the level file. load_chunk
+    builds the sprites of a chunk and returns them, release_chunk gets rid of
+    sprites again. Since the camera never scrolls back, released chunks are
+    never loaded a second time and only the loaded chunks are kept in memory.
+    refresh, if given, is called with sprites before their rects are read,
+    for sprites that are not kept up to date.
+    '''
+    def __init__(self, chunks, load_chunk, release_chunk, refresh=None):
+        self.chunks = sorted(chunks, key=lambda chunk: chunk['x'])
+        self.load_chunk = load_chunk
+        self.release_chunk = release_chunk
+        self.refresh = refresh
+        self.next_chunk = 0
+        self.sprites = {}       # Sprites of the loaded chunks, by chunk index
+        self.loaded = []        # (chunk index, right edge) of the loaded chunks
+        self.stragglers = {}    # Moving sprites that walked ahead of their released chunk,
+                                # each with its (chunk index, position in the chunk)
+
+    def build(self, index):
+        '''Instantiates the sprites of a chunk from the level data without loading it into the stream'''
+        return self.load_chunk(self.chunks[index])
+
+    def seek(self, next_chunk, loaded, sprites, stragglers):
+        '''Jumps to a saved point of the stream.
+
+        sprites holds the sprites of every loaded chunk by chunk index and
+        stragglers their (chunk index, position) by sprite, as in the stream.
+        '''
+        self.next_chunk = next_chunk
+        self.loaded = list(loaded)
+        self.sprites = dict(sprites)
+        self.stragglers = dict(stragglers)
+
+    def update(self, camera):
+        '''Loads the chunks coming up and releases the ones left behind'''
+        window = camera.active_rect
+
+        while (self.next_chunk < len(self.chunks) and
+               self.chunks[self.next_chunk]['x'] <= window.right + STREAM_AHEAD):
+            sprites = self.sprites[self.next_chunk] = self.build(self.next_chunk)
+            # Wide sprites such as ground blocks can reach past the next chunks
+            default = self.chunks[self.next_chunk]['x']
+            right = max((sprite.rect.right for sprite in sprites), default=default)
+            self.loaded.append((self.next_chunk, right))
+            self.next_chunk += 1
+
+        for index, right in self.loaded:
+            if right < window.left:
+                # The chunk is dropped, its sprites wait as stragglers until they are behind too
+                for position, sprite in enumerate(self.sprites.pop(index)):
+                    self.stragglers[sprite] = (index, position)
+        self.loaded = [(index, right) for index, right in self.loaded if right >= window.left]
+
+        if self.stragglers:
+            if self.refresh is not None:
+                self.refresh(list(self.stragglers))
+
+            behind = [
+                sprite for sprite in self.stragglers
+                if not sprite.alive() or sprite.rect.right < window.left
+            ]
+            self.release_chunk(behind)
+            for sprite in behind:
+                del self.stragglers[sprite]
@@ -0,0 +1,372 @@
+'''Step and reset API for training agents on level 1, batched over worker processes'''
+
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+# Environments never open a window, this has to happen before the game is imported
+os.environ.setdefault('MARIO_HEADLESS', '1')
+
+import numpy as np
+
+# Local imports
+from settings import SCORE_REWARD, COIN_REWARD, PROGRESS_REWARD, LIFE_REWARD
+from game_setup import GAME_OVER_SCREEN
+from game_clock import SimulatedClock
+from input_replay import KeyState, RECORDED_KEYS
+from characters.mario import Player
+from characters.entity_constants import END
+from screens.level1 import Level1
+from observation import LevelObserver
+from pixels import PixelObserver
+
+# An action is a bitmask of held keys, bit i is RECORDED_KEYS[i]. The rewind key is left out
+NUM_ACTIONS = 1 << (len(RECORDED_KEYS) - 1)
+
+OBS_FIELDS = ('x', 'y', 'vel_x', 'vel_y', 'score', 'coins', 'lives', 'time')
+
+
+class MarioEnv:
+    '''A single game of level 1 that moves frame_skip updates per step.
+
+    The episode lasts until the game is over, the flag is reached or
+    max_steps updates have passed. Losing a life restarts the level like
+    the game does, without the loading screen.
+
+    observation='player' gives the OBS_FIELDS of the player as one array,
+    observation='level' a dict that adds the solid tile grid and the nearby
+    entity records of a LevelObserver and observation='pixels' a dict
+    with the player fields and the stacked grayscale frames of a PixelObserver.
+    '''
+    def __init__(self, max_steps=None, frame_skip=1, observation='player'):
+        if observation not in ('player', 'level', 'pixels'):
+            raise ValueError(f'unknown observation {observation!r}')
+        self.max_steps = max_steps
+        self.frame_skip = frame_skip
+        self.observer = LevelObserver() if observation == 'level' else None
+        self.pixel_observer = PixelObserver() if observation == 'pixels' else None
+        self.reset()
+
+    def reset(self):
+        '''Starts a new game and returns the first observation'''
+        self.clock = SimulatedClock()
+        self.player = Player(self.clock)
+        self.level = Level1(self.player, self.clock)
+        self.steps = 0
+        self.best_x = self.player.pos.x
+        self.last_score = self.player.score
+        self.last_coins = self.player.coins
+        if self.pixel_observer is not None:
+            self.pixel_observer.reset(self.level)
+
+        return self.observe(new_frame=False)
+
+    def observe(self, new_frame=True):
+        '''Returns the observation of the current update.
+
+        new_frame=False leaves the pixel frame stack as it is.
+        '''
+        player = self.player
+        stats = np.array([
+            player.pos.x, player.pos.y, player.vel.x, player.vel.y,
+            player.score, player.coins, player.lives, self.level.time_limit
+        ], dtype=np.float32)
+        # The observers reuse their arrays, so each observation gets copies
+        if self.pixel_observer is not None:
+            frames = self.pixel_observer.frames
+            if new_frame:
+                frames = self.pixel_observer.observe(self.level)
+            return {'player': stats, 'frames': frames.copy()}
+        if self.observer is None:
+            return stats
+
+        tiles, entities = self.observer.observe(self.level)
+        return {'player': stats, 'tiles': tiles.copy(), 'entities': entities.copy()}
+
+    def observation_spec(self):
+        '''Returns {key: (shape, dtype)} of the observations, plain arrays use the key None.
+
+        The spec comes from the observers' arrays, nothing is observed, so the
+        pixel frame stack is left as it is.
+        '''
+        player = ((len(OBS_FIELDS),), np.dtype(np.float32).str)
+        if self.pixel_observer is not None:
+            arrays = {'frames': self.pixel_observer.frames}
+        elif self.observer is not None:
+            arrays = {'tiles': self.observer.tiles, 'entities': self.observer.entities}
+        else:
+            return {None: player}
+
+        return {'player': player, **{key: (array.shape, array.dtype.str) for key, array in arrays.items()}}
+
+    def step(self, action):
+        '''Holds the keys of action for frame_skip updates, returns (obs, reward, done, info)'''
+        keys = KeyState(int(action))
+        reward = 0
+        for _ in range(self.frame_skip):
+            update_reward, done = self.__update(keys)
+            reward += update_reward
+            if done:
+                break
+
+        player = self.player
+        info = {
+            'score': player.score, 'coins': player.coins,
+            'x': player.pos.x, 'lives': player.lives, 'steps': self.steps
+        }
+
+        return self.observe(), reward, done, info
+
+    def __update(self, keys):
+        '''Runs one update, returns its reward and whether the episode is over'''
+        self.clock.tick()
+        self.level.update(self.clock.now(), keys)
+        self.steps += 1
+        player = self.player
+
+        reward = (
+            (player.score - self.last_score) * SCORE_REWARD +
+            (player.coins - self.last_coins) * COIN_REWARD
+        )
+        self.last_score = player.score
+        self.last_coins = player.coins
+        if player.pos.x > self.best_x:
+            reward += (player.pos.x - self.best_x) * PROGRESS_REWARD
+            self.best_x = player.pos.x
+
+        done = player.state == END
+        if not self.level.running:
+            reward += LIFE_REWARD
+            if self.level.next == GAME_OVER_SCREEN:
+                done = True
+            else:
+                self.level.start()
+        if self.max_steps is not None and self.steps >= self.max_steps:
+            done = True
+
+        return reward, done
+
+
+def _join(arrays, join=np.stack):
+    '''Stacks or concatenates observations, key by key if they are dicts'''
+    if isinstance(arrays[0], dict):
+        return {key: join([array[key] for array in arrays]) for key in arrays[0]}
+
+    return join(arrays)
+
+
+class SharedObservations:
+    '''Observation arrays of every game in shared memory, slots steps deep.
+
+    Each key of the observation gets one block holding an array of shape
+    (slots, num_envs, *shape). Workers write the rows of their games in
+    the slot of the current step and the parent reads the slot as a view,
+    so observations are never pickled. A slot is written again slots steps
+    later, anything kept longer than that has to be copied. The creator
+    passes names=None and unlinks the blocks on close.
+    '''
+    def __init__(self, spec, num_envs, slots=2, names=None):
+        self.slots = slots
+        self.owner = names is None
+        self.blocks = {}
+        self.arrays = {}
+        for key, (shape, dtype) in spec.items():
+            dtype = np.dtype(dtype)
+            shape = (slots, num_envs) + tuple(shape)
+            if self.owner:
+                size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray(shape, dtype, buffer=block.buf)
+
+    @property
+    def names(self):
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def write(self, slot, index, obs):
+        '''Stores the observation of game index in slot'''
+        if not isinstance(obs, dict):
+            obs = {None: obs}
+        for key, array in obs.items():
+            self.arrays[key][slot, index] = array
+
+    def read(self, slot):
+        '''Returns views of the observations of every game in slot'''
+        if None in self.arrays:
+            return self.arrays[None][slot]
+
+        return {key: array[slot] for key, array in self.arrays.items()}
+
+    def close(self):
+        '''Releases the blocks, the creator also unlinks them'''
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = {}
+
+
+def _run_envs(envs, command, actions, shared=None, slot=0, start=0):
+    '''Runs a command on a list of envs, finished episodes are started again.
+
+    With shared, observations are written to its slot from row start on
+    and None is returned in their place.
+    '''
+    if command == 'reset':
+        obs = [env.reset() for env in envs]
+        if shared is None:
+            return _join(obs)
+        for i, ob in enumerate(obs):
+            shared.write(slot, start + i, ob)
+        return None
+
+    obs, rewards, dones, infos = [], [], [], []
+    for env, action in zip(envs, actions):
+        ob, reward, done, info = env.step(action)
+        if done:
+            info['final_observation'] = ob
+            ob = env.reset()
+        obs.append(ob)
+        rewards.append(reward)
+        dones.append(done)
+        infos.append(info)
+
+    if shared is None:
+        obs = _join(obs)
+    else:
+        for i, ob in enumerate(obs):
+            shared.write(slot, start + i, ob)
+        obs = None
+
+    return obs, np.array(rewards, dtype=np.float32), np.array(dones), infos
+
+
+def _worker(conn, num_envs, env_kwargs, start, shared_slots):
+    '''Serves step and reset commands for a slice of the environments.
+
+    With shared_slots the worker first sends the observation spec and
+    waits for the names of the shared blocks to write observations to.
+    '''
+    envs = [MarioEnv(**env_kwargs) for _ in range(num_envs)]
+    shared = None
+    try:
+        if shared_slots:
+            conn.send(envs[0].observation_spec())
+            spec, total, names = conn.recv()
+            shared = SharedObservations(spec, total, shared_slots, names)
+        while True:
+            command, actions, slot = conn.recv()
+            if command == 'close':
+                break
+            conn.send(_run_envs(envs, command, actions, shared, slot, start))
+    finally:
+        if shared is not None:
+            shared.close()
+        conn.close()
+
+
+class VecMarioEnv:
+    '''N independent games stepped together, spread over worker processes.
+
+    Observations, rewards and dones come back as arrays with one row per
+    game. Games whose episode ends are reset straight away, the last
+    observation of the old episode is in info['final_observation'].
+    With processes=0 the games run in this process. env_kwargs go to every
+    MarioEnv, a larger frame_skip does more updates per round trip to the workers.
+
+    With shared_slots workers write observations into SharedObservations
+    instead of sending them back, and the arrays returned are views of
+    it that stay valid for shared_slots steps. 0 pickles them instead.
+    '''
+    def __init__(self, num_envs, processes=None, shared_slots=2, **env_kwargs):
+        self.num_envs = num_envs
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, num_envs)
+
+        self.envs = None
+        self.conns = []
+        self.procs = []
+        self.shared = None
+        self.slot = 0
+        if processes == 0:
+            self.envs = [MarioEnv(**env_kwargs) for _ in range(num_envs)]
+            self.slices = [slice(0, num_envs)]
+            return
+
+        # Spread the games as evenly as possible
+        sizes = [num_envs // processes + (i < num_envs % processes) for i in range(processes)]
+        starts = np.cumsum([0] + sizes)
+        self.slices = [slice(start, start + size) for start, size in zip(starts, sizes)]
+
+        # Spawned workers start without any of this process's pygame state
+        ctx = mp.get_context('spawn')
+        for size, start in zip(sizes, starts):
+            parent, child = ctx.Pipe()
+            args = (child, size, env_kwargs, int(start), shared_slots)
+            proc = ctx.Process(target=_worker, args=args, daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+        if shared_slots:
+            specs = [conn.recv() for conn in self.conns]
+            self.shared = SharedObservations(specs[0], num_envs, shared_slots)
+            for conn in self.conns:
+                conn.send((specs[0], num_envs, self.shared.names))
+
+    def __run(self, command, actions=None):
+        if self.envs is not None:
+            return [_run_envs(self.envs, command, actions)]
+
+        # Each step writes the next slot, the replies are the handshake that it is filled
+        if self.shared is not None:
+            self.slot = (self.slot + 1) % self.shared.slots
+        for conn, part in zip(self.conns, self.slices):
+            conn.send((command, None if actions is None else actions[part], self.slot))
+
+        return [conn.recv() for conn in self.conns]
+
+    def __observations(self, results):
+        if self.shared is not None:
+            return self.shared.read(self.slot)
+
+        return _join(results, np.concatenate)
+
+    def reset(self):
+        '''Starts every game again, returns the observations'''
+        return self.__observations(self.__run('reset'))
+
+    def step(self, actions):
+        '''Steps every game with its action, returns (obs, rewards, dones, infos)'''
+        actions = np.asarray(actions)
+        results = self.__run('step', actions)
+        obs = self.__observations([result[0] for result in results])
+        rewards = np.concatenate([result[1] for result in results])
+        dones = np.concatenate([result[2] for result in results])
+        infos = [info for result in results for info in result[3]]
+
+        return obs, rewards, dones, infos
+
+    def close(self):
+        '''Stops the worker processes'''
+        for conn in self.conns:
+            conn.send(('close', None, None))
+            conn.close()
+        for proc in self.procs:
+            proc.join()
+        self.conns = []
+        self.procs = []
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
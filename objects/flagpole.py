@@ -5,7 +5,7 @@ import pygame as pg
 # Local imports
 from characters.entity_constants import *
 from game_setup import IMAGES, SOUND
-from tools import scale_image
+from tools import scale_image, get_mask
 
 vec = pg.math.Vector2
 
@@ -16,14 +16,13 @@ class Pole(pg.sprite.Sprite):
         self.image = self.__get_image()
         self.rect = self.image.get_rect()
         self.rect.bottomright = self.pos
-        self.mask = pg.mask.from_surface(self.image)
+        self.mask = get_mask(self.image)
 
     def __get_image(self):
         return scale_image(IMAGES['pole'], FLAG_POLE_SCALAR)
 
     def update(self, *args):
         self.rect.bottomright = self.pos
-        self.mask = pg.mask.from_surface(self.image)
 
 class Flag(pg.sprite.Sprite):
     def __init__(self, x, y):
@@ -32,7 +31,7 @@ class Flag(pg.sprite.Sprite):
         self.image = self.__get_image()
         self.rect = self.image.get_rect()
         self.rect.topleft = self.pos
-        self.mask = pg.mask.from_surface(self.image)
+        self.mask = get_mask(self.image)
         self.state = RESTING
 
     def __get_image(self):
@@ -43,7 +42,6 @@ class Flag(pg.sprite.Sprite):
         if player.state == POLE_SLIDING:
             self.pos.y += 3
         self.rect.topleft = self.pos
-        self.mask = pg.mask.from_surface(self.image)
 
 class Finial(pg.sprite.Sprite):
     def __init__(self, x, y):
@@ -52,11 +50,10 @@ class Finial(pg.sprite.Sprite):
         self.image = self.__get_image()
         self.rect = self.image.get_rect()
         self.rect.midbottom = self.pos
-        self.mask = pg.mask.from_surface(self.image)
+        self.mask = get_mask(self.image)
         
     def __get_image(self):
         return scale_image(IMAGES['finial'], FLAG_POLE_SCALAR)
 
     def update(self, *args):
         self.rect.midbottom = self.pos
-        self.mask = pg.mask.from_surface(self.image)
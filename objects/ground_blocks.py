@@ -20,6 +20,7 @@ class GroundBlock(pg.sprite.Sprite):
         self.pos = vec(x, GROUND)
         self.image = self.__get_image(width)
         self.rect = self.image.get_rect()
+        self.rect.topleft = self.pos
 
     def __get_image(self, width):
         '''Creates a pygame surface and adds ground images to it to fill the entire width'''
@@ -0,0 +1,88 @@
+'''Numeric observations of a level, built from sprite data instead of pixels'''
+
+import numpy as np
+
+# Local imports
+from settings import WIDTH, HEIGHT, OBS_TILE_SIZE, OBS_MAX_ENTITIES
+from characters.enemies import Goomba
+from objects.blocks import Brick
+from powerups.powerup import Mushroom, FireFlower, Star, Fireball
+
+# Tile codes of the solid grid
+EMPTY, GROUND, PIPE, QUESTION_BOX, BRICK, OPENED_BOX = range(6)
+
+# Entity type codes, 0 marks an unused row. 5 was the coin out of a box, now a particle
+ENTITY_TYPES = {Goomba: 1, Mushroom: 2, FireFlower: 3, Star: 4, Fireball: 6}
+ENTITY_FIELDS = ('type', 'x', 'y', 'vel_x', 'vel_y', 'state')
+
+
+class LevelObserver:
+    '''Fills preallocated arrays describing the level around the player.
+
+    tiles is a (rows, columns) grid over the screen with the code of the
+    solid covering each tile. entities holds one row per goomba, powerup or
+    fireball in the activation window, nearest to the player first, with
+    x and y relative to the player.
+    '''
+    def __init__(self, tile_size=OBS_TILE_SIZE, max_entities=OBS_MAX_ENTITIES):
+        self.tile_size = tile_size
+        self.tiles = np.zeros((-(-HEIGHT // tile_size), -(-WIDTH // tile_size)), dtype=np.uint8)
+        self.entities = np.zeros((max_entities, len(ENTITY_FIELDS)), dtype=np.float32)
+
+    def observe(self, level):
+        '''Fills tiles and entities from level and returns them'''
+        self.__fill_tiles(level)
+        self.__fill_entities(level)
+
+        return self.tiles, self.entities
+
+    def __fill_tiles(self, level):
+        tiles = self.tiles
+        size = self.tiles.shape
+        tile = self.tile_size
+        view = level.camera.rect
+        tiles.fill(EMPTY)
+
+        def fill(sprites, code):
+            for sprite in sprites:
+                rect = sprite.rect
+                left = max((rect.left - view.left) // tile, 0)
+                right = min(-(-(rect.right - view.left) // tile), size[1])
+                top = max(rect.top // tile, 0)
+                bottom = min(-(-rect.bottom // tile), size[0])
+                if left < right and top < bottom:
+                    tiles[top:bottom, left:right] = code
+
+        solids = level.solids
+        fill(solids.query(view, level.ground_blocks), GROUND)
+        fill(solids.query(view, level.pipes), PIPE)
+        for box in solids.query(view, level.boxes):
+            if box.image is box.opened:
+                code = OPENED_BOX
+            elif isinstance(box, Brick):
+                code = BRICK
+            else:
+                code = QUESTION_BOX
+            fill((box,), code)
+
+    def __fill_entities(self, level):
+        entities = self.entities
+        entities.fill(0)
+        px, py = level.player.rect.center
+        window = level.camera.active_rect
+
+        nearby = level.walkers.materialise([window]) + [
+            sprite for group in (level.powerups, level.player.fireballs)
+            for sprite in group if sprite.rect.colliderect(window)
+        ]
+        def distance(sprite):
+            x, y = sprite.rect.center
+            return (x - px) ** 2 + (y - py) ** 2
+        nearby.sort(key=distance)
+
+        for row, sprite in zip(entities, nearby):
+            x, y = sprite.rect.center
+            row[:] = (
+                ENTITY_TYPES[type(sprite)], x - px, y - py,
+                sprite.vel.x, sprite.vel.y, getattr(sprite, 'state', 0)
+            )
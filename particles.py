@@ -0,0 +1,233 @@
+'''Short-lived effects kept in arrays: brick pieces, coins out of boxes and score labels'''
+
+import numpy as np
+
+# Local imports
+from settings import (
+    HEIGHT, PARTICLE_CAPACITY, SCORE_LABEL_DURATION,
+    BRICK_PIECE_ANGLES, BRICK_PIECES_PER_BREAK
+)
+from characters.entity_constants import GRAVITY, COIN_VEL_Y
+from powerups.powerup_states import *
+from game_setup import IMAGES
+from tools import get_image, scale_image, get_rotations
+from atlas import load_frames
+from labels import render_score
+
+# Particle kinds
+PIECE, COIN, SCORE = range(3)
+
+CORNERS = (TOP_LEFT, TOP_RIGHT, BOTTOM_LEFT, BOTTOM_RIGHT)
+PIECE_IMAGES = {
+    TOP_LEFT: 'brick-small', TOP_RIGHT: 'brick-corner',
+    BOTTOM_LEFT: 'brick-corner', BOTTOM_RIGHT: 'brick-big'
+}
+PIECE_VELOCITIES = {
+    TOP_LEFT: (-LOW_BRICK_PIECE_VEL_X, HIGH_BRICK_PIECE_VEL_Y),
+    TOP_RIGHT: (LOW_BRICK_PIECE_VEL_X, LOW_BRICK_PIECE_VEL_Y),
+    BOTTOM_LEFT: (-HIGH_BRICK_PIECE_VEL_X, MED_BRICK_PIECE_VEL_Y),
+    BOTTOM_RIGHT: (HIGH_BRICK_PIECE_VEL_X, MED_BRICK_PIECE_VEL_Y)
+}
+SCORE_VEL_Y = -2
+COIN_SCORE = 200    # Score label shown when a coin lands back in its box
+
+NEVER = 2 ** 62     # Expiry time of particles that only die by falling
+
+
+def build_coin_frames():
+    '''Slices the spinning coin frames, see atlas'''
+    start_x = 147
+    start_y = 150
+    width = 62
+    height = 61
+
+    spritesheet = IMAGES['coin_sheet']
+    images = []
+    for i in range(6):
+        x = start_x + i*(width)
+        images.append(scale_image(get_image(spritesheet, x, start_y, width, height), 0.4))
+
+    return {'coin': images}
+
+
+def load_coin_images():
+    '''Returns the coin frames from the atlas, shared by the coin particles and the loading screen'''
+    return load_frames('coin')['coin']
+
+
+class ParticleSystem:
+    '''Every effect particle of a level as a struct of arrays.
+
+    The first count rows of each array are the live particles. update()
+    moves all of them with one set of array operations and draw() hands
+    the visible ones to a single Surface.blits call, so the cost of a
+    frame barely grows with the number of effects. A particle dies when
+    it falls to its floor or its expiry time passes. When all capacity
+    rows are in use the oldest particle makes room for the new one.
+
+    Images live in one shared list, a particle shows image
+    first + int(age * frame_rate) % frames, placed with the anchor of
+    that image at its position.
+    '''
+    def __init__(self, clock, capacity=PARTICLE_CAPACITY):
+        self.clock = clock
+        self.count = 0
+        self.serial = 0     # Spawn counter, tells the oldest particle apart
+
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.value = np.zeros(capacity, dtype=np.uint32)    # Corner of a piece, score of a label
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.gravity = np.zeros(capacity)
+        self.age = np.zeros(capacity, dtype=np.int32)      # Updates since it was spawned
+        self.floor = np.zeros(capacity)                     # Dies once y gets here
+        self.expires = np.zeros(capacity, dtype=np.int64)  # ms
+        self.first = np.zeros(capacity, dtype=np.int32)
+        self.frames = np.zeros(capacity, dtype=np.int32)
+        self.frame_rate = np.zeros(capacity)
+        self.order = np.zeros(capacity, dtype=np.int64)
+
+        self.images = []
+        self.anchors = np.zeros((0, 2))     # Offset from the position to the top left of each image
+        self.sizes = np.zeros((0, 2))
+        self.image_index = {}               # Image set key to the index of its first image
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        '''Removes every particle'''
+        self.count = 0
+
+    def __register(self, key, images, anchor):
+        '''Adds a set of images the first time it is used, returns the index of the first'''
+        first = self.image_index.get(key)
+        if first is None:
+            first = self.image_index[key] = len(self.images)
+            sizes = np.array([image.get_size() for image in images], dtype=float)
+            self.images.extend(images)
+            self.sizes = np.concatenate((self.sizes, sizes))
+            self.anchors = np.concatenate((self.anchors, sizes * anchor))
+
+        return first
+
+    def spawn(self, kind, x, y, value=0):
+        '''Adds a particle of kind, see brick_pieces, coin and score, and returns its row'''
+        if self.count == len(self.kind):
+            i = int(np.argmin(self.order[:self.count]))
+        else:
+            i = self.count
+            self.count += 1
+        self.order[i] = self.serial
+        self.serial += 1
+
+        if kind == PIECE:
+            corner = CORNERS[value]
+            image = scale_image(IMAGES[PIECE_IMAGES[corner]], BRICK_PIECE_SCALAR)
+            rotations = get_rotations(image, BRICK_PIECE_ANGLES)
+            first = self.__register(('piece', PIECE_IMAGES[corner]), rotations, (0.5, 0.5))
+            # The piece starts with its inner corner on x, y
+            width, height = image.get_size()
+            dx = width / 2 if corner in (TOP_RIGHT, BOTTOM_RIGHT) else -width / 2
+            dy = height / 2 if corner in (BOTTOM_LEFT, BOTTOM_RIGHT) else -height / 2
+            self.__set(i, kind, value, (x + dx, y + dy), PIECE_VELOCITIES[corner], BRICK_PIECE_GRAVITY,
+                       HEIGHT + height, NEVER, first, len(rotations), 2 * BRICK_PIECE_ANGLES / 360)
+        elif kind == COIN:
+            images = load_coin_images()
+            first = self.__register('coin', images, (0.5, 1))
+            self.__set(i, kind, value, (x, y), (0, COIN_VEL_Y), GRAVITY, y, NEVER, first, len(images), 0.5)
+        elif kind == SCORE:
+            first = self.__register(('score', value), [render_score(str(value))], (0, 0))
+            self.__set(i, kind, value, (x, y), (0, SCORE_VEL_Y), 0, np.inf,
+                       self.clock.now() + SCORE_LABEL_DURATION, first, 1, 0)
+
+        return i
+
+    def __set(self, i, kind, value, pos, vel, gravity, floor, expires, first, frames, frame_rate):
+        self.kind[i] = kind
+        self.value[i] = value
+        self.pos[i] = pos
+        self.vel[i] = vel
+        self.gravity[i] = gravity
+        self.age[i] = 0
+        self.floor[i] = floor
+        self.expires[i] = expires
+        self.first[i] = first
+        self.frames[i] = frames
+        self.frame_rate[i] = frame_rate
+
+    def brick_pieces(self, x, y):
+        '''Breaks a brick centered on x, y into pieces flying out of its corners'''
+        for corner in range(min(BRICK_PIECES_PER_BREAK, len(CORNERS))):
+            self.spawn(PIECE, x, y, corner)
+
+    def coin(self, x, y):
+        '''Pops a coin out of a box, x, y is the middle of the top of the box'''
+        self.spawn(COIN, x, y, COIN_SCORE)
+
+    def score(self, value, x, y):
+        '''Shows a floating score label with its top left at x, y'''
+        self.spawn(SCORE, x, y, int(value))
+
+    def __image_indices(self, n):
+        # Particles show the frame of the update before, like sprites that animate after moving
+        age = np.maximum(self.age[:n] - 1, 0)
+        step = (age * self.frame_rate[:n] + 0.5).astype(np.int32)
+
+        return self.first[:n] + step % self.frames[:n]
+
+    def update(self, current_time):
+        '''Moves every particle one update and removes the ones that died'''
+        n = self.count
+        if not n:
+            return
+
+        vel = self.vel[:n]
+        vel[:, 1] += self.gravity[:n]
+        self.pos[:n] += vel
+        self.age[:n] += 1
+        dead = (self.pos[:n, 1] >= self.floor[:n]) | (current_time > self.expires[:n])
+        if not dead.any():
+            return
+
+        # Coins that land leave their score behind
+        landed = np.flatnonzero(dead & (self.kind[:n] == COIN))
+        topleft = self.pos[landed] - self.anchors[self.__image_indices(n)[landed]]
+        scores = list(zip(self.value[landed].tolist(), *topleft.T.tolist()))
+
+        alive = ~dead
+        self.count = int(alive.sum())
+        for array in (
+            self.kind, self.value, self.pos, self.vel, self.gravity, self.age, self.floor,
+            self.expires, self.first, self.frames, self.frame_rate, self.order
+        ):
+            array[:self.count] = array[:n][alive]
+
+        for value, x, y in scores:
+            self.score(value, x, y)
+
+    def draw(self, win, camera, kinds=(PIECE, COIN, SCORE)):
+        '''Draws the particles of kinds that are on screen with one blits call.
+
+        kinds lets the level draw each kind in the layer of the sprites it replaced.
+        '''
+        n = self.count
+        if not n:
+            return
+
+        indices = self.__image_indices(n)
+        topleft = np.rint(self.pos[:n] - self.anchors[indices])
+        topleft[:, 0] -= camera.view.x
+        bottomright = topleft + self.sizes[indices]
+        width, height = win.get_size()
+        visible = np.flatnonzero(
+            np.isin(self.kind[:n], kinds) &
+            (bottomright[:, 0] > 0) & (topleft[:, 0] < width) &
+            (bottomright[:, 1] > 0) & (topleft[:, 1] < height)
+        )
+
+        images = self.images
+        win.blits(
+            [(images[i], dest) for i, dest in zip(indices[visible].tolist(), topleft[visible].tolist())],
+            doreturn=False
+        )
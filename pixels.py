@@ -0,0 +1,73 @@
+'''Small stacked pixel observations read straight from an off-screen surface'''
+
+import numpy as np
+import pygame as pg
+
+# Local imports
+from settings import SCREEN_SIZE, OBS_FRAME_SIZE, OBS_FRAME_STACK
+
+# Integer luma weights (ITU-R 601) that add up to 256
+LUMA = (77, 150, 29)
+
+
+class PixelObserver:
+    '''Draws a screen off-screen and samples it down into a stack of frames.
+
+    The surface is read through surfarray.pixels3d, a view of its pixels,
+    so the full size image is never copied, only the sampled points are.
+    Every step after that writes into arrays allocated once, frames is (stack, height, width) for
+    grayscale or (stack, height, width, 3) for color, oldest frame first.
+    '''
+    def __init__(self, size=OBS_FRAME_SIZE, stack=OBS_FRAME_STACK, grayscale=True):
+        width, height = size
+        self.grayscale = grayscale
+        self.surface = pg.Surface(SCREEN_SIZE, 0, 32)
+
+        # Nearest neighbour sampling, the middle pixel of each cell
+        screen_w, screen_h = SCREEN_SIZE
+        xs = ((np.arange(width) + 0.5) * screen_w / width).astype(np.intp)
+        ys = ((np.arange(height) + 0.5) * screen_h / height).astype(np.intp)
+        self.points = np.ix_(xs, ys)
+
+        self.sample = np.empty((height, width, 3), dtype=np.uint8)
+        self.luma = np.empty((height, width), dtype=np.uint16)
+        self.channel = np.empty((height, width), dtype=np.uint16)
+        shape = (stack, height, width) if grayscale else (stack, height, width, 3)
+        self.frames = np.zeros(shape, dtype=np.uint8)
+
+    def __draw_and_sample(self, screen):
+        '''Draws screen and leaves the downsampled frame in self.sample'''
+        screen.draw(self.surface)
+        # The view locks the surface, it has to be gone before the next draw
+        # Only the sampled points are gathered, pixels3d is indexed (x, y)
+        view = pg.surfarray.pixels3d(self.surface)
+        self.sample.transpose(1, 0, 2)[...] = view[self.points]
+        del view
+
+    def __push(self, frame_slot):
+        '''Writes the sampled frame into frame_slot, in gray if needed'''
+        if not self.grayscale:
+            frame_slot[...] = self.sample
+            return
+
+        np.multiply(self.sample[..., 0], LUMA[0], out=self.luma, dtype=np.uint16)
+        for i in (1, 2):
+            np.multiply(self.sample[..., i], LUMA[i], out=self.channel, dtype=np.uint16)
+            self.luma += self.channel
+        np.right_shift(self.luma, 8, out=frame_slot, casting='unsafe')
+
+    def reset(self, screen):
+        '''Fills the whole stack with the current frame and returns the stack'''
+        self.__draw_and_sample(screen)
+        self.__push(self.frames[-1])
+        self.frames[:-1] = self.frames[-1]
+
+        return self.frames
+
+    def observe(self, screen):
+        '''Adds the current frame to the stack and returns the stack, which is reused'''
+        self.__draw_and_sample(screen)
+        self.frames[:-1] = self.frames[1:]
+        self.__push(self.frames[-1])
+
+        return self.frames
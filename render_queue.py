@@ -0,0 +1,144 @@
+'''Collects the blits of a frame and hands them to the target surface in one call'''
+
+import math
+
+import pygame as pg
+
+# Local imports
+from settings import DIRTY_AREA_LIMIT
+
+
+class RenderQueue:
+    '''Stands in for the target surface while a frame is drawn.
+
+    blit and blits only append (surface, dest, area) entries, in the order
+    they are made, so later layers still end up on top. submit() draws all
+    of them with a single Surface.blits call, or fblits where the surface
+    has it and no entry needs an area. count is the number of blits the
+    last submitted frame made.
+
+    A dirty submit compares the entries with those of the last frame and
+    only redraws the regions where something appeared, disappeared, moved
+    or changed places in the draw order, everything else is left as it is on the target. It returns
+    those regions for pg.display.update. When they cover more than
+    DIRTY_AREA_LIMIT of the target the whole frame is drawn instead.
+    '''
+    def __init__(self):
+        self.target = None
+        self.background = None
+        self.entries = []
+        self.keys = []
+        self.drawn = {}         # Entries of the last frame and their place in it
+        self.drawn_on = None    # Target of the last frame
+        self.count = 0
+
+    def begin(self, target, background=None):
+        '''Starts a frame that will be drawn onto target, filled with background first if given'''
+        self.target = target
+        self.background = background
+        self.entries = []
+
+    def get_size(self):
+        return self.target.get_size()
+
+    def blit(self, source, dest, area=None):
+        self.entries.append((source, dest) if area is None else (source, dest, area))
+
+    def blits(self, sequence, doreturn=False):
+        self.entries.extend(sequence)
+
+    def submit(self, dirty=False):
+        '''Draws the queued blits onto the target.
+
+        Returns the rects that changed for a dirty submit, None when the whole target was drawn.
+        '''
+        self.keys = keys = [_key(entry) for entry in self.entries]
+        drawn, self.drawn = self.drawn, {key: i for i, key in enumerate(keys)}
+        drawn_on, self.drawn_on = self.drawn_on, self.target
+        rects = None
+        if dirty and drawn_on is self.target:
+            rects = self.__changed(keys, drawn)
+            area = sum(rect.width * rect.height for rect in rects)
+            width, height = self.target.get_size()
+            if area > DIRTY_AREA_LIMIT * width * height:
+                rects = None
+
+        if rects is None:
+            self.__draw(self.entries)
+        else:
+            self.__draw_regions(rects)
+        self.entries = []
+        self.keys = []
+        self.target = None
+
+        return rects
+
+    def __draw(self, entries):
+        if self.background is not None:
+            self.target.fill(self.background)
+        fblits = getattr(self.target, 'fblits', None)
+        if fblits is not None and all(len(entry) == 2 for entry in entries):
+            fblits(entries)
+        else:
+            self.target.blits(entries, doreturn=False)
+        self.count = len(entries)
+
+    def __draw_regions(self, rects):
+        '''Redraws only the parts of the target inside rects'''
+        count = 0
+        bounds = [_bounds(key) for key in self.keys]
+        for rect in rects:
+            self.target.set_clip(rect)
+            entries = [entry for entry, bound in zip(self.entries, bounds) if bound.colliderect(rect)]
+            self.__draw(entries)
+            count += self.count
+        self.target.set_clip(None)
+        self.count = count
+
+    def __changed(self, keys, drawn):
+        '''Returns the merged screen regions of the entries that differ between the two frames'''
+        changed = []
+        last = -1
+        for key in keys:
+            index = drawn.get(key)
+            # An entry drawn before one it used to be drawn after may now be covered by it
+            if index is None or index < last:
+                changed.append(_bounds(key))
+            else:
+                last = index
+        current = set(keys)
+        changed += [_bounds(key) for key in drawn if key not in current]
+
+        # Overlapping regions are merged so nothing is drawn twice
+        target = self.target.get_rect()
+        merged = []
+        for rect in changed:
+            rect = rect.clip(target)
+            if not rect.width or not rect.height:
+                continue
+            i = rect.collidelist(merged)
+            while i != -1:
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+
+        return merged
+
+
+def _key(entry):
+    '''Returns what tells an entry apart from the same surface drawn elsewhere'''
+    source, dest, *area = entry
+    area = tuple(area[0]) if area and area[0] is not None else None
+
+    return source, dest[0], dest[1], area
+
+
+def _bounds(key):
+    '''Returns the rect the entry of a key covers on the target'''
+    source, x, y, area = key
+    width, height = source.get_size() if area is None else area[2:]
+    if isinstance(x, float) or isinstance(y, float):
+        # Fractional positions land on either neighbouring pixel
+        return pg.Rect(math.floor(x), math.floor(y), width + 1, height + 1)
+
+    return pg.Rect(x, y, width, height)
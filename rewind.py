@@ -0,0 +1,120 @@
+'''Keeps the last minutes of a level in memory so play can be rewound'''
+
+import sys
+import zlib
+from collections import deque
+
+# Local imports
+from settings import REWIND_BUDGET_MB, REWIND_KEYFRAME_INTERVAL
+
+# Memory taken by each entry on top of its bytes
+POINTER_SIZE = 8                # Slot of an entry in a list or deque
+EMPTY_LIST_SIZE = sys.getsizeof([])
+
+
+def xor_bytes(a, b):
+    '''Returns a XOR b, the shorter one padded with zeros'''
+    size = max(len(a), len(b))
+    x = int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')
+
+    return x.to_bytes(size, 'little')
+
+
+def keyframe_cost(segment):
+    '''Returns the bytes a segment takes without its deltas'''
+    keyframe, _ = segment
+
+    return sys.getsizeof(segment) + sys.getsizeof(keyframe) + EMPTY_LIST_SIZE + POINTER_SIZE
+
+
+def delta_cost(entry):
+    '''Returns the bytes a (size, delta) entry takes'''
+    size, delta = entry
+
+    return sys.getsizeof(entry) + sys.getsizeof(size) + sys.getsizeof(delta) + POINTER_SIZE
+
+
+class RewindBuffer:
+    '''A ring of level snapshots with a fixed memory budget.
+
+    Every keyframe_interval ticks a full snapshot is kept, the ticks in
+    between are stored as the compressed XOR with their keyframe. Most of a
+    level does not change from one tick to the next, so the deltas are a
+    few dozen bytes and any tick is decoded from one keyframe and one delta.
+    When the budget is used up the oldest keyframe and its deltas go. The
+    budget counts the Python objects holding the data too, which for a
+    small delta are as big as the delta itself.
+    '''
+    def __init__(self, budget_mb=REWIND_BUDGET_MB, keyframe_interval=REWIND_KEYFRAME_INTERVAL):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.keyframe_interval = keyframe_interval
+        self.segments = deque()     # [keyframe, [(size, delta)]] from oldest to newest
+        self.size = 0               # Bytes held
+        self.frames = 0
+
+    def __len__(self):
+        return self.frames
+
+    def clear(self):
+        '''Forgets every tick'''
+        self.segments.clear()
+        self.size = 0
+        self.frames = 0
+
+    def record(self, level):
+        '''Adds the current state of level as the newest tick'''
+        data = level.snapshot()
+        if not self.segments or len(self.segments[-1][1]) + 1 >= self.keyframe_interval:
+            segment = [data, []]
+            self.segments.append(segment)
+            self.size += keyframe_cost(segment)
+        else:
+            keyframe, deltas = self.segments[-1]
+            entry = (len(data), zlib.compress(xor_bytes(keyframe, data), 1))
+            deltas.append(entry)
+            self.size += delta_cost(entry)
+        self.frames += 1
+
+        # Always keep the segment being written to
+        while self.size > self.budget and len(self.segments) > 1:
+            self.__drop_oldest()
+
+    def __drop_oldest(self):
+        segment = self.segments.popleft()
+        deltas = segment[1]
+        self.size -= keyframe_cost(segment) + sum(delta_cost(entry) for entry in deltas)
+        self.frames -= 1 + len(deltas)
+
+    def __pop_newest(self):
+        '''Forgets the newest tick'''
+        deltas = self.segments[-1][1]
+        if deltas:
+            self.size -= delta_cost(deltas.pop())
+        else:
+            self.size -= keyframe_cost(self.segments.pop())
+        self.frames -= 1
+
+    def peek(self, ticks=0):
+        '''Returns the snapshot from ticks before the newest one'''
+        if not 0 <= ticks < self.frames:
+            raise IndexError('rewind buffer does not go back that far')
+        for keyframe, deltas in reversed(self.segments):
+            if ticks <= len(deltas):
+                if ticks == len(deltas):
+                    return keyframe
+                size, delta = deltas[len(deltas) - 1 - ticks]
+                return xor_bytes(keyframe, zlib.decompress(delta))[:size]
+            ticks -= len(deltas) + 1
+
+    def rewind(self, level, ticks=1):
+        '''Goes back ticks into the past, forgetting the newer ticks.
+
+        Returns False and leaves level alone if there is nothing that old.
+        '''
+        if ticks >= self.frames:
+            return False
+        for _ in range(ticks):
+            self.__pop_newest()
+        level.restore(self.peek())
+
+        return True
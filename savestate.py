@@ -0,0 +1,403 @@
+'''Packs the state of a running level into a compact binary blob and back'''
+
+import struct
+
+import numpy as np
+
+# Local imports
+from settings import START_SCREEN, LOADING_SCREEN, GAME_OVER_SCREEN, LEVEL_SCREEN
+from characters.entity_constants import *
+from characters.enemies import Goomba
+from characters.walkers import FIELDS as WALKER_FIELDS
+from objects.blocks import QuestionBox, Brick
+from objects.flagpole import Flag
+from powerups.powerup import Mushroom, FireFlower, Star, Fireball
+from powerups.powerup_states import CLOSED, BUMPED, MOVING, OPENED, BREAKING
+from spatial_grid import SpatialGrid
+from tools import get_mask
+
+MAGIC = b'MSAV'
+VERSION = 5
+
+# String states are stored as their index in these tuples
+MARIO_STATES = (
+    RESTING, FALLING, JUMPING, SLIDING, GROWING_LARGE, LARGE_TO_SMALL,
+    LARGE_TO_FIRE, FIRE_TO_LARGE, POLE_SLIDING, END
+)
+BLOCK_STATES = (CLOSED, BUMPED, MOVING, OPENED, BREAKING)
+SCREENS = (START_SCREEN, LOADING_SCREEN, GAME_OVER_SCREEN, LEVEL_SCREEN)
+POWERUPS = (Mushroom, FireFlower, Star)
+
+# Level groups chunk sprites other than goombas can be in, stored as one bit each.
+# Goombas are saved straight from the walker arrays
+CHUNK_GROUPS = ('ground_blocks', 'pipes', 'boxes', 'flagpole')
+# Groups that go into the collision grid, in the order chunks add them
+SOLID_GROUPS = ('boxes', 'pipes', 'ground_blocks')
+
+PLAYER_FRAME_SETS = (
+    'normal_small_frames', 'green_small_frames', 'red_small_frames', 'black_small_frames',
+    'normal_big_frames', 'green_big_frames', 'red_big_frames', 'black_big_frames', 'fire_frames'
+)
+PLAYER_FLAGS = (
+    'is_transition', 'is_large', 'has_star', 'losing_invincibility', 'is_jumping',
+    'is_falling', 'allow_jump', 'is_walking', 'is_invincible', 'song_is_playing'
+)
+
+# Positions and velocities are doubles so a restored level plays out exactly like the original
+HEADER  = struct.Struct('<4sBiq')         # magic, version, time, clock state
+LEVEL   = struct.Struct('<iiibBBddddHH')  # time limit, time stamp, death timer, lives left, running, next,
+                                          # camera x and prev x, prev player pos, next chunk, loaded chunks
+LOADED  = struct.Struct('<Hi')            # chunk index, right edge
+RECT    = struct.Struct('<iiii')
+PLAYER  = struct.Struct('<dddddddiibBHiiiiiiBBBBH')
+FLAG    = struct.Struct('<dd')
+BOX     = struct.Struct('<ddddddBb?')
+WALKERS = struct.Struct('<I')            # number of live goombas, followed by one array per field
+                                         # and the chunk index and position of each goomba
+ORIGIN  = struct.Struct('<HH')           # chunk index, position in the chunk
+POWERUP = struct.Struct('<BdddddddBB')   # type, pos, vel, acc, box y, state, direction
+FIREBALL = struct.Struct('<dddddd')
+PARTICLE = struct.Struct('<BIddddidq')   # kind, value, pos, vel, age, floor, expiry time
+COUNT   = struct.Struct('<H')
+BYTE    = struct.Struct('<B')
+
+# Player frame tables, keyed by the id of the first frame of the shared atlas
+_frame_tables = {}
+
+
+def _player_frames(player):
+    '''Returns (frames, {id(frame): index}) for every frame the player can show'''
+    key = id(player.normal_small_frames[0][0])
+    table = _frame_tables.get(key)
+    if table is None:
+        frames = [
+            frame for name in PLAYER_FRAME_SETS
+            for direction in getattr(player, name) for frame in direction
+        ]
+        table = _frame_tables[key] = (frames, {id(frame): i for i, frame in enumerate(frames)})
+
+    return table
+
+
+class _Writer:
+    '''Collects packed records'''
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, record, *values):
+        self.parts.append(record.pack(*values))
+
+    def rect(self, rect):
+        self.parts.append(RECT.pack(*rect))
+
+    def array(self, values, dtype):
+        self.parts.append(values.astype(np.dtype(dtype).newbyteorder('<')).tobytes())
+
+    def getvalue(self):
+        return b''.join(self.parts)
+
+
+class _Reader:
+    '''Reads packed records from a blob in order'''
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, record):
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    def rect(self, sprite):
+        sprite.rect = sprite.image.get_rect()
+        sprite.rect.update(*self.unpack(RECT))
+
+    def array(self, dtype, count):
+        dtype = np.dtype(dtype).newbyteorder('<')
+        values = np.frombuffer(self.data, dtype, count, self.offset)
+        self.offset += values.nbytes
+        return values.astype(dtype.newbyteorder('='))
+
+
+def snapshot(level):
+    '''Returns the state of level and everything in it as bytes'''
+    w = _Writer()
+    clock = level.clock
+    camera = level.camera
+    stream = level.stream
+
+    w.pack(HEADER, MAGIC, VERSION, clock.now(), clock.get_state())
+    w.pack(
+        LEVEL, level.time_limit, level.time_stamp, level.death_timer, level.lives_left,
+        level.running, SCREENS.index(level.next), camera.x, camera.prev_x,
+        *level.prev_player_pos, stream.next_chunk, len(stream.loaded)
+    )
+    for index, right in stream.loaded:
+        w.pack(LOADED, index, right)
+
+    _pack_player(w, level.player)
+
+    # Only the chunks in memory are saved, released ones are built again from the level data
+    groups = [getattr(level, name) for name in CHUNK_GROUPS]
+    origins = {}
+    for index, _ in stream.loaded:
+        for position, sprite in enumerate(stream.sprites[index]):
+            origins[sprite] = (index, position)
+            if not isinstance(sprite, Goomba):
+                _pack_chunk_sprite(w, sprite, groups)
+    origins.update(stream.stragglers)
+    stragglers = [sprite for sprite in stream.stragglers if not isinstance(sprite, Goomba)]
+    w.pack(COUNT, len(stragglers))
+    for sprite in stragglers:
+        w.pack(ORIGIN, *stream.stragglers[sprite])
+        _pack_chunk_sprite(w, sprite, groups)
+
+    walkers = level.walkers
+    rows = walkers.live()
+    w.pack(WALKERS, len(rows))
+    for name, dtype in WALKER_FIELDS:
+        w.array(getattr(walkers, name)[rows], dtype)
+    goomba_origins = np.array([origins[walkers.sprites[row]] for row in rows.tolist()], dtype=np.uint16)
+    goomba_origins = goomba_origins.reshape(-1, 2)
+    w.array(goomba_origins[:, 0], np.uint16)
+    w.array(goomba_origins[:, 1], np.uint16)
+
+    w.pack(COUNT, len(level.powerups))
+    for powerup in level.powerups:
+        _pack_powerup(w, powerup)
+
+    w.pack(COUNT, len(level.player.fireballs))
+    for fireball in level.player.fireballs:
+        w.pack(FIREBALL, *fireball.pos, *fireball.vel, *fireball.acc)
+        w.rect(fireball.rect)
+
+    particles = level.particles
+    w.pack(COUNT, len(particles))
+    for i in range(len(particles)):
+        w.pack(
+            PARTICLE, particles.kind[i], particles.value[i], *particles.pos[i], *particles.vel[i],
+            particles.age[i], particles.floor[i], particles.expires[i]
+        )
+
+    return w.getvalue()
+
+
+def _pack_player(w, player):
+    frames, index = _player_frames(player)
+    flags = 0
+    for bit, name in enumerate(PLAYER_FLAGS):
+        if getattr(player, name):
+            flags |= 1 << bit
+    w.pack(
+        PLAYER, *player.pos, *player.vel, *player.acc, player.gravity,
+        player.score, player.coins, player.lives, player.pow, flags,
+        player.fireball_shot, player.current_timer, player.transition_timer,
+        player.walk_timer, player.invincible_begin_timer, player.star_timer,
+        player.invincible_index, player.image_index, MARIO_STATES.index(player.state),
+        player.dir, index[id(player.image)]
+    )
+    w.rect(player.rect)
+
+
+def _pack_chunk_sprite(w, sprite, groups):
+    '''Packs the groups a level chunk sprite is in and the parts of it that can change'''
+    bits = 0
+    for bit, group in enumerate(groups):
+        if group.has_internal(sprite):
+            bits |= 1 << bit
+    w.pack(BYTE, bits)
+    if not bits:
+        return
+    if isinstance(sprite, (QuestionBox, Brick)):
+        w.pack(
+            BOX, *sprite.pos, *sprite.vel, *sprite.acc, BLOCK_STATES.index(sprite.state),
+            sprite.num_of_pows, sprite.image is sprite.opened
+        )
+        w.rect(sprite.rect)
+    elif isinstance(sprite, Flag):
+        w.pack(FLAG, *sprite.pos)
+
+
+def _pack_powerup(w, powerup):
+    direction = getattr(powerup, 'direction', RIGHT)
+    w.pack(
+        POWERUP, POWERUPS.index(type(powerup)), *powerup.pos, *powerup.vel, *powerup.acc,
+        powerup.box_y, powerup.state, direction
+    )
+    w.rect(powerup.rect)
+
+
+def restore(level, data):
+    '''Puts level back into the state of a snapshot'''
+    r = _Reader(data)
+    magic, version, now, clock_state = r.unpack(HEADER)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a level snapshot of this version')
+
+    # Timers are shifted when the clock can not be set back
+    clock = level.clock
+    clock.set_state(clock_state)
+    shift = clock.now() - now
+
+    (time_limit, time_stamp, death_timer, level.lives_left, running, next_screen,
+     camera_x, prev_camera_x, prev_x, prev_y, next_chunk, num_loaded) = r.unpack(LEVEL)
+    level.time_limit = time_limit
+    level.time_stamp = time_stamp + shift
+    level.death_timer = death_timer + shift
+    level.running = bool(running)
+    level.next = SCREENS[next_screen]
+    level.prev_player_pos = (prev_x, prev_y)
+    level.camera.move_to(camera_x, prev_camera_x)
+    loaded = [r.unpack(LOADED) for _ in range(num_loaded)]
+
+    _unpack_player(r, level.player, shift)
+
+    # Sprites the stream still has are reused, other chunks are built again from the level data.
+    # Building a chunk adds it to the level, so the groups are only refilled once everything is read
+    stream = level.stream
+    reused = {origin: sprite for sprite, origin in stream.stragglers.items()}
+    built = dict(stream.sprites)
+
+    def chunk(index):
+        sprites = built.get(index)
+        if sprites is None:
+            sprites = built[index] = [
+                reused.get((index, position), sprite) for position, sprite in enumerate(stream.build(index))
+            ]
+        return sprites
+
+    def sprite_at(index, position):
+        sprite = reused.get((index, position))
+        return chunk(index)[position] if sprite is None else sprite
+
+    members = []
+    for index, _ in loaded:
+        for sprite in chunk(index):
+            if not isinstance(sprite, Goomba):
+                members.append((sprite, _unpack_chunk_sprite(r, sprite, shift)))
+    stragglers = {}
+    count, = r.unpack(COUNT)
+    for _ in range(count):
+        origin = r.unpack(ORIGIN)
+        sprite = sprite_at(*origin)
+        stragglers[sprite] = origin
+        members.append((sprite, _unpack_chunk_sprite(r, sprite, shift)))
+
+    # Goomba sprites are brought up to date by the walkers when they are needed
+    count, = r.unpack(WALKERS)
+    arrays = {name: r.array(dtype, count) for name, dtype in WALKER_FIELDS}
+    arrays['kill_timer'] += shift
+    goomba_origins = zip(r.array(np.uint16, count).tolist(), r.array(np.uint16, count).tolist())
+    in_memory = {index for index, _ in loaded}
+    goombas = []
+    for origin in goomba_origins:
+        goomba = sprite_at(*origin)
+        goombas.append(goomba)
+        if origin[0] not in in_memory:
+            stragglers[goomba] = origin
+
+    groups = [getattr(level, name) for name in CHUNK_GROUPS]
+    for group in groups:
+        group.empty()
+    for sprite, bits in members:
+        for bit, group in enumerate(groups):
+            if bits & (1 << bit):
+                group.add(sprite)
+    level.walkers.set_rows(goombas, arrays)
+    level.enemies.empty()
+    level.enemies.add(*goombas)
+    chunks = {index: chunk(index) for index, _ in loaded}
+    stream.seek(next_chunk, loaded, chunks, stragglers)
+
+    level.solids = SpatialGrid()
+    for sprites in (*chunks.values(), list(stragglers)):
+        for name in SOLID_GROUPS:
+            group = getattr(level, name)
+            level.solids.add(*[sprite for sprite in sprites if group.has_internal(sprite)])
+
+    level.powerups.empty()
+    count, = r.unpack(COUNT)
+    for _ in range(count):
+        level.powerups.add(_unpack_powerup(r))
+
+    level.player.fireballs.empty()
+    count, = r.unpack(COUNT)
+    for _ in range(count):
+        pos_x, pos_y, vel_x, vel_y, acc_x, acc_y = r.unpack(FIREBALL)
+        fireball = Fireball(pos_x, pos_y, LEFT if vel_x < 0 else RIGHT)
+        fireball.pos.update(pos_x, pos_y)
+        fireball.vel.update(vel_x, vel_y)
+        fireball.acc.update(acc_x, acc_y)
+        r.rect(fireball)
+        level.player.fireballs.add(fireball)
+    level.fireballs = level.player.fireballs
+
+    particles = level.particles
+    particles.clear()
+    count, = r.unpack(COUNT)
+    for _ in range(count):
+        kind, value, pos_x, pos_y, vel_x, vel_y, age, floor, expires = r.unpack(PARTICLE)
+        i = particles.spawn(kind, pos_x, pos_y, value)
+        particles.pos[i] = pos_x, pos_y
+        particles.vel[i] = vel_x, vel_y
+        particles.age[i] = age
+        particles.floor[i] = floor
+        particles.expires[i] = expires + shift
+
+
+def _unpack_player(r, player, shift):
+    (pos_x, pos_y, vel_x, vel_y, acc_x, acc_y, player.gravity,
+     player.score, player.coins, player.lives, player.pow, flags,
+     fireball_shot, current_timer, transition_timer, walk_timer, invincible_begin_timer, star_timer,
+     player.invincible_index, player.image_index, state, player.dir, image) = r.unpack(PLAYER)
+    player.pos.update(pos_x, pos_y)
+    player.vel.update(vel_x, vel_y)
+    player.acc.update(acc_x, acc_y)
+    for bit, name in enumerate(PLAYER_FLAGS):
+        setattr(player, name, bool(flags & (1 << bit)))
+    player.fireball_shot = fireball_shot + shift
+    player.current_timer = current_timer + shift
+    player.transition_timer = transition_timer + shift
+    player.walk_timer = walk_timer + shift
+    player.invincible_begin_timer = invincible_begin_timer + shift
+    player.star_timer = star_timer + shift
+    player.state = MARIO_STATES[state]
+    player.image = _player_frames(player)[0][image]
+    player.mask = get_mask(player.image)
+    r.rect(player)
+
+
+def _unpack_chunk_sprite(r, sprite, shift):
+    '''Unpacks what _pack_chunk_sprite packed into sprite and returns the group bits'''
+    bits, = r.unpack(BYTE)
+    if not bits:
+        return bits
+    if isinstance(sprite, (QuestionBox, Brick)):
+        pos_x, pos_y, vel_x, vel_y, acc_x, acc_y, state, sprite.num_of_pows, opened = r.unpack(BOX)
+        sprite.pos.update(pos_x, pos_y)
+        sprite.vel.update(vel_x, vel_y)
+        sprite.acc.update(acc_x, acc_y)
+        sprite.state = BLOCK_STATES[state]
+        sprite.image = sprite.opened if opened else sprite.closed
+        r.rect(sprite)
+    elif isinstance(sprite, Flag):
+        sprite.pos.update(*r.unpack(FLAG))
+        sprite.rect.topleft = sprite.pos
+
+    return bits
+
+
+def _unpack_powerup(r):
+    kind, pos_x, pos_y, vel_x, vel_y, acc_x, acc_y, box_y, state, direction = r.unpack(POWERUP)
+    cls = POWERUPS[kind]
+    powerup = cls(pos_x, pos_y, state, box_y)
+    if cls is Star:
+        powerup.direction = direction
+    powerup.pos.update(pos_x, pos_y)
+    powerup.vel.update(vel_x, vel_y)
+    powerup.acc.update(acc_x, acc_y)
+    powerup.box_y = box_y
+    powerup.state = state
+    r.rect(powerup)
+
+    return powerup
@@ -2,14 +2,16 @@
 # Local imports
 from settings import START_SCREEN
 from game_setup import *
-from tools import get_image
+from tools import get_image, get_font
+from render_queue import RenderQueue
 
 class GameOverScreen:
     def __init__(self):
         self.next = START_SCREEN
         self.running = True
-        self.mario_font  = pg.font.Font(FONTS['ARCADECLASSIC'], 34)
+        self.mario_font  = get_font(FONTS['ARCADECLASSIC'], 34)
         self.game_over_label = self.mario_font.render("GAME OVER",1,WHITE)
+        self.render_queue = RenderQueue()
  
     def start(self, current_time):
         self.start_time = current_time
@@ -19,7 +21,10 @@ class GameOverScreen:
         if current_time - self.start_time > 3000:
             self.running = False
 
-    def draw(self, win):
-        win.fill((0,0,0))
-        win.blit(self.game_over_label,(300,200))
-     
\ No newline at end of file
+    def draw(self, win, dirty=False, **kwargs):
+        '''Draws the game over label, returns the changed rects of a dirty draw'''
+        queue = self.render_queue
+        queue.begin(win, (0, 0, 0))
+        queue.blit(self.game_over_label,(300,200))
+
+        return queue.submit(dirty)
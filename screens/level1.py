@@ -4,27 +4,48 @@ import pygame as pg
 
 # Local imports
 from game_setup import IMAGES, DATA, FONTS
-from settings import WHITE, WIDTH, LOADING_SCREEN, GAME_OVER_SCREEN
+from settings import WHITE, LOADING_SCREEN, GAME_OVER_SCREEN, INTERPOLATE
 from objects.blocks import QuestionBox, Brick
 from objects.pipe import Pipe
 from objects.ground_blocks import GroundBlock
 from objects.flagpole import Pole, Flag, Finial
 from characters.enemies import Goomba
+from characters.walkers import WalkerManager
 from characters.entity_constants import *
 from powerups.powerup_states import OPENED
+from spatial_grid import SpatialGrid
+from camera import Camera, between
+from tools import resize_image, get_font
+from hud import glyph_font, HudText
+from particles import ParticleSystem, PIECE, COIN, SCORE
+from render_queue import RenderQueue
+from level_stream import LevelStream
+import savestate
 
 class Level1:
-    '''A class for the first level'''
-    def __init__(self, player):
+    '''A class for the first level.
+
+    With a rewind buffer every update is recorded, and holding backspace
+    steps back one update at a time instead of playing.
+    '''
+    def __init__(self, player, clock=None, rewind=None):
         super().__init__()
         self.lives_left = STARTING_LIVES
         self.player = player
+        self.clock = clock or player.clock
+        self.rewind = rewind
         self.player_group = pg.sprite.Group(self.player)
+        # Every blit of a frame goes through one Surface.blits call
+        self.render_queue = RenderQueue()
         
         self.start()
 
     def start(self, *args):
-        self.bg_x = 0
+        if self.rewind is not None:
+            # Past lives cannot be rewound into
+            self.rewind.clear()
+        self.camera = Camera()
+        self.drawn_view_x = None    # Camera position of the last drawn frame
         self.death_timer = 0
        
         self.next = LOADING_SCREEN
@@ -36,33 +57,52 @@ class Level1:
         self.bg = IMAGES['background2']
         
         self.player.reset()
+        self.prev_player_pos = self.player.rect.midbottom
+        self.prev_positions = {}    # Powerup or fireball -> midbottom before the last update
 
         # Initially empty sprite groups
-        self.brick_pieces = pg.sprite.Group()
         self.powerups = pg.sprite.Group()
         self.fireballs = pg.sprite.Group()
+        # Brick pieces, coins out of boxes and score labels
+        self.particles = ParticleSystem(self.clock)
         
         self.__load_level_objects()
         self.__setup_labels()
-        self.coin_pic = pg.transform.scale(IMAGES['label_coin'], (26, 26))
+        self.coin_pic = resize_image(IMAGES['label_coin'], (26, 26))
 
     def __load_level_objects(self):
-        '''Loads all sprite objects from level_data'''
+        '''Sets up the level groups and streams in the first chunks from level_data'''
         with open(self.level_data) as f:
             data = json.load(f)
 
-        self.ground_blocks = pg.sprite.Group(*[GroundBlock(**block) for block in data['ground-blocks']])
-        self.pipes = pg.sprite.Group(*[Pipe(**pipe) for pipe in data['pipes']])
-        self.enemies = pg.sprite.Group(*[Goomba(**goomba) for goomba in data['goombas']])
-        self.boxes = pg.sprite.Group(
-            *[QuestionBox(self.powerups, **box) for box in data['q-boxes']],
-            *[Brick(self.powerups, self.brick_pieces, **brick) for brick in data['bricks']]
-        )
+        self.ground_blocks = pg.sprite.Group()
+        self.pipes = pg.sprite.Group()
+        self.enemies = pg.sprite.Group()
+        # Moves the goombas, their sprites are only updated where they are needed
+        self.walkers = WalkerManager()
+        self.boxes = pg.sprite.Group()
+        self.flagpole = pg.sprite.Group()
+
+        # Static geometry used by all collision checks
+        self.solids = SpatialGrid()
+
+        self.stream = LevelStream(data['chunks'], self.__load_chunk, self.__release_chunk, self.walkers.store)
+        self.stream.update(self.camera)
+
+    def __load_chunk(self, chunk):
+        '''Creates the sprites of a level chunk and returns them'''
+        ground_blocks = [GroundBlock(**block) for block in chunk.get('ground-blocks', [])]
+        pipes = [Pipe(**pipe) for pipe in chunk.get('pipes', [])]
+        enemies = [Goomba(**goomba) for goomba in chunk.get('goombas', [])]
+        boxes = [
+            *[QuestionBox(self.powerups, self.particles, **box) for box in chunk.get('q-boxes', [])],
+            *[Brick(self.powerups, self.particles, **brick) for brick in chunk.get('bricks', [])]
+        ]
 
         def flagpole(right_x):
             pole = Pole(right_x, GROUND)
             block_x = right_x - (pole.image.get_width() / 2) - 21
-            block = QuestionBox(self.powerups, x=block_x, y=GROUND-42)
+            block = QuestionBox(self.powerups, self.particles, x=block_x, y=GROUND-42)
             block.state = OPENED
             block.image = block.opened
             y_flag = GROUND - pole.image.get_height()
@@ -70,34 +110,45 @@ class Level1:
             x_finial = right_x - pole.image.get_width() / 2
             finial = Finial(x_finial, GROUND - pole.image.get_height())
 
-            return pg.sprite.Group(pole, flag, finial, block)
+            return [pole, flag, finial, block]
 
-        self.flagpole = flagpole(data['flagpole']['x'])
+        flagpole_parts = flagpole(chunk['flagpole']['x']) if 'flagpole' in chunk else []
 
-        self.non_player_sprites = pg.sprite.Group(
-            self.boxes, 
-            self.enemies, 
-            self.ground_blocks, 
-            self.pipes, 
-            self.flagpole
-        )
+        self.ground_blocks.add(*ground_blocks)
+        self.pipes.add(*pipes)
+        self.enemies.add(*enemies)
+        self.walkers.add(*enemies)
+        self.boxes.add(*boxes)
+        self.flagpole.add(*flagpole_parts)
+        self.solids.add(*boxes, *pipes, *ground_blocks)
+
+        return [*ground_blocks, *pipes, *enemies, *boxes, *flagpole_parts]
+
+    def __release_chunk(self, sprites):
+        '''Removes sprites that are left behind the camera from the level'''
+        for sprite in sprites:
+            sprite.kill()
+        self.solids.remove(*sprites)
+        self.walkers.remove(*sprites)
 
     def __setup_labels(self):
-        self.mario_font = pg.font.Font(FONTS['ARCADECLASSIC'], 34)
+        self.mario_font = get_font(FONTS['ARCADECLASSIC'], 34)
         self.mario_label = self.mario_font.render('MARIO', 1, WHITE)
-        self.score_label = self.mario_font.render('000000', 1, WHITE)
-        self.coin_label = self.mario_font.render('x 00', 1, WHITE)
         self.time_label = self.mario_font.render('TIME', 1, WHITE)
-        self.time_limit_label = self.mario_font.render('300', 1, WHITE)
         self.world_label = self.mario_font.render('WORLD', 1, WHITE)
         self.level_label = self.mario_font.render('1x1', 1, WHITE)
-        self.labels = []        
+
+        # Labels that change during play are composed from pre-rendered glyphs
+        hud_font = glyph_font(FONTS['ARCADECLASSIC'], 34)
+        self.score_label = HudText(hud_font, '000000')
+        self.coin_label = HudText(hud_font, 'x 00')
+        self.time_limit_label = HudText(hud_font, '300')
 
     def __check_time_limit(self, current_time):
         if current_time-self.time_stamp >= 1000:
             self.time_stamp = current_time
             self.time_limit -= 1
-            self.time_limit_label = self.mario_font.render(str(self.time_limit), 1, WHITE)
+            self.time_limit_label.set(str(self.time_limit))
         
         if self.time_limit == 0:
             self.player.lives -= 1
@@ -113,91 +164,117 @@ class Level1:
             self.running = False
 
     def update(self, current_time, keys, **kwargs):
-        '''Updates everything'''
-        self.__move_screen()
-        
-        self.enemies.update(current_time, self.boxes, self.pipes, self.ground_blocks)
+        '''Updates everything inside the camera's activation window'''
+        if self.rewind is not None and keys[pg.K_BACKSPACE]:
+            self.rewind.rewind(self)
+            return
+
+        self.walkers.update(current_time, self.camera, self.solids, self.boxes, self.pipes, self.ground_blocks)
+        self.prev_player_pos = self.player.rect.midbottom
+        self.prev_positions = {sprite: sprite.rect.midbottom for sprite in (*self.powerups, *self.fireballs)}
+        enemies = self.walkers.near(self.player)
         self.player_group.update(
-            current_time, keys, self.labels, self.flagpole, self.powerups, self.boxes, self.pipes, 
-            self.ground_blocks, self.enemies
+            current_time, keys, self.particles, self.flagpole, self.camera, self.powerups, self.solids, 
+            self.boxes, self.pipes, self.ground_blocks, enemies
         )
+        self.walkers.absorb(enemies)
+        self.camera.follow(self.player)
+        self.stream.update(self.camera)
         self.fireballs = self.player.fireballs
-        self.fireballs.update(self.player, self.labels, self.boxes, self.ground_blocks, self.pipes, self.enemies)
-        self.boxes.update(self.player)
-        self.pipes.update()
-        self.ground_blocks.update()
-        self.brick_pieces.update()
-        self.flagpole.update(self.player)
-        self.powerups.update(self.labels, self.boxes, self.ground_blocks, self.pipes)
-        self.__update_labels(current_time)
+        for sprite in (*self.fireballs, *self.powerups):
+            if not sprite.rect.colliderect(self.camera.active_rect):
+                # Fireballs and powerups that leave the activation window are gone for good,
+                # so these groups only ever hold the few sprites near the screen
+                sprite.kill()
+        enemies = self.walkers.near(*self.fireballs)
+        self.fireballs.update(
+            self.player, self.particles, self.solids, self.boxes, self.ground_blocks, self.pipes, enemies
+        )
+        self.walkers.absorb(enemies)
+        for box in self.solids.query(self.camera.active_rect, self.boxes):
+            box.update(self.player)
+        # The flagpole group only holds the parts of loaded chunks
+        for sprite in self.camera.active(self.flagpole):
+            sprite.update(self.player)
+        for powerup in self.powerups:
+            powerup.update(self.particles, self.solids, self.boxes, self.ground_blocks, self.pipes)
+        self.particles.update(current_time)
+        self.__update_hud()
         self.__check_time_limit(current_time)
         self.__check_lives()
+        if self.rewind is not None:
+            self.rewind.record(self)
+
+    def draw(self, win, alpha=1, dirty=False, **kwargs):
+        '''Draws everything on screen, alpha of the way between the last two updates.
 
-    def draw(self, win):
-        '''Draws everything on screen'''
+        A dirty draw only redraws what changed and returns the changed rects, while
+        the camera scrolls the whole background moves so everything is drawn.
+        '''
         def redraw_window(win):
-            win.fill((0, 0, 0))
-            win.blit(self.bg, (self.bg_x, 0))  
+            win.blit(self.bg, (-self.camera.view.x / 7, 0))  
             win.blit(self.coin_pic, (230, 44))
 
         def draw_labels(win):
             win.blit(self.mario_label, (70, 16))
-            win.blit(self.score_label, (70, 40))
-            win.blit(self.coin_label, (260, 40))
+            win.blit(self.score_label.image, (70, 40))
+            win.blit(self.coin_label.image, (260, 40))
             win.blit(self.world_label, (410, 16))
             win.blit(self.level_label, (420, 40))
             win.blit(self.time_label, (600, 16))
-            win.blit(self.time_limit_label, (610, 40))
-        
-            for l in self.labels:
-                l.draw(win)
-
-        redraw_window(win)
-        self.ground_blocks.draw(win)
-        self.brick_pieces.draw(win)
-        self.powerups.draw(win)
-        self.fireballs.draw(win)
-        self.boxes.draw(win)
-        self.pipes.draw(win)
-        self.enemies.draw(win)
-        self.player_group.draw(win)
-        self.flagpole.draw(win)
-        draw_labels(win)
-
-    def __update_labels(self, current_time):
-        '''Updates all the text labels on screen'''
-        def update_floating_labels():
-            i = 0
-            while i < len(self.labels):
-                self.labels[i].update()
-                if current_time - self.labels[i].start_timer > 1000:
-                    del self.labels[i]
-                else:
-                    i += 1
-        
+            win.blit(self.time_limit_label.image, (610, 40))
+
+        def draw_player(win):
+            rect = between(self.player.rect, self.prev_player_pos, alpha)
+            win.blit(self.player.image, self.camera.apply(rect))
+
+        if not INTERPOLATE:
+            alpha = 1
+        self.camera.interpolate(alpha)
+
+        queue = self.render_queue
+        queue.begin(win, (0, 0, 0))
+        redraw_window(queue)
+        self.camera.draw(queue, self.solids.query(self.camera.view, self.ground_blocks))
+        # Brick pieces and box coins go behind the level like the sprites they were, scores over the HUD
+        self.particles.draw(queue, self.camera, (PIECE,))
+        self.camera.draw(queue, self.powerups, self.prev_positions, alpha)
+        self.particles.draw(queue, self.camera, (COIN,))
+        self.camera.draw(queue, self.fireballs, self.prev_positions, alpha)
+        self.camera.draw(queue, self.solids.query(self.camera.view, self.boxes))
+        self.camera.draw(queue, self.solids.query(self.camera.view, self.pipes))
+        goombas = self.walkers.materialise([self.camera.view])
+        self.camera.draw(queue, goombas, self.walkers.previous(goombas), alpha)
+        draw_player(queue)
+        self.camera.draw(queue, self.flagpole)
+        draw_labels(queue)
+        self.particles.draw(queue, self.camera, (SCORE,))
+
+        scrolled = self.camera.view.x != self.drawn_view_x
+        self.drawn_view_x = self.camera.view.x
+        return queue.submit(dirty and not scrolled)
+
+    def snapshot(self):
+        '''Returns the state of the level as bytes, see savestate'''
+        return savestate.snapshot(self)
+
+    def restore(self, data):
+        '''Puts the level back into the state of a snapshot'''
+        savestate.restore(self, data)
+        # The restored powerups and fireballs are new sprites, drawn where they are
+        self.prev_positions = {}
+        self.__update_hud()
+        self.time_limit_label.set(str(self.time_limit))
+
+    def __update_hud(self):
+        '''Sets the score and coin counters to the player's'''
         score_text = str(self.player.score)
         zeros = 6 - len(score_text)  # Number of zeros before the actual score
         score_text = '0'*zeros + score_text
-        self.score_label = self.mario_font.render(score_text, 1, WHITE)
+        self.score_label.set(score_text)
 
         # Coin label
         coin_text = str(self.player.coins)
         zeros = 2 - len(coin_text)  # Number of zeros before the actual score
         coin_text = 'x0'*zeros + coin_text
-        self.coin_label = self.mario_font.render(coin_text, 1, WHITE)
-
-        update_floating_labels()
-
-    def __move_screen(self):
-        '''Adjusts the position of all elements based on marios x movement'''
-        if self.player.rect.centerx >= WIDTH/2:
-            self.player.pos.x = WIDTH/2
-            for entity in self.non_player_sprites:
-                entity.pos.x -= self.player.vel.x
-            for entity in self.powerups:
-                entity.pos.x -= self.player.vel.x
-            for entity in self.brick_pieces:
-                entity.pos.x -= self.player.vel.x
-            for entity in self.fireballs:
-                entity.pos.x -= self.player.vel.x
-            self.bg_x -= self.player.vel.x / 7
+        self.coin_label.set(coin_text)
@@ -1,11 +1,24 @@
 '''Module that stores game settings values'''
 
+import os
+
 WIDTH = 800
 HEIGHT = 600
 SCREEN_SIZE = (WIDTH, HEIGHT)
 
 TITLE = 'Super Mario Bros'
-FPS = 60
+FPS = 60                # Updates per second, the game logic always steps at this rate
+
+# Rendering
+MAX_RENDER_FPS = 120    # Cap on drawn frames per second, 0 draws as often as the machine can and keeps a core busy
+MAX_FRAME_TIME = 0.25   # s, longer stalls are not caught up on so the game cannot spiral
+INTERPOLATE = True      # Draw the camera and everything that moves between its last two updated positions
+CAPTURE_QUEUE_SIZE = 32  # Captured frames waiting to be written, 1.4 MB each
+DIRTY_RECTS = False     # Only redraw and push the parts of the window that changed
+DIRTY_AREA_LIMIT = 0.5  # Fraction of the window that can change before a frame is drawn whole again
+
+# Runs the game without a window or audio device (set MARIO_HEADLESS=1)
+HEADLESS = os.environ.get('MARIO_HEADLESS', '0') == '1'
 
 # Paths
 IMAGE_PATH = 'images'
@@ -13,6 +26,17 @@ MUSIC_PATH = 'music'
 SOUND_PATH = 'sound'
 FONTS_PATH = 'fonts'
 DATA_PATH = 'data'
+CACHE_PATH = 'cache'
+
+# Width of the cached sprite atlas
+ATLAS_WIDTH = 512
+
+# Number of frames each memoized image function in tools keeps
+IMAGE_CACHE_SIZE = 256
+
+# Effect particles: brick pieces, coins out of boxes and floating score labels
+PARTICLE_CAPACITY    = 256    # Particles at once, the oldest is reused beyond that
+SCORE_LABEL_DURATION = 1000   # ms
 
 # Colors    R    G    B
 WHITE   =  (255, 255, 255)
@@ -27,3 +51,36 @@ LEVEL_SCREEN     = 'level-screen'
 
 LEVEL_1 = 'level-1'
 
+# Brick pieces
+BRICK_PIECE_ANGLES     = 180   # Prerendered rotations of each piece image, 180 turns 2 degrees at a time
+BRICK_PIECES_PER_BREAK = 4     # 1 to 4, the corners are used in order
+
+# Collision grid
+GRID_CELL_SIZE = 128     # Width and height of a grid cell in pixels
+GRID_MARGIN    = 16      # Extra pixels around each static sprite when bucketing
+
+# Entities further than this outside the screen are neither updated nor drawn
+ACTIVATION_MARGIN = 100
+
+# Goombas this close to Mario or a fireball are brought up to date for collisions
+ENEMY_INTERACTION_MARGIN = 200
+
+# Level chunks are loaded once they are this close to the activation window
+STREAM_AHEAD = 400
+
+# Rewinding, hold backspace to go back in time
+REWIND_BUDGET_MB         = 8     # Memory for past ticks, 0 turns rewinding off
+REWIND_KEYFRAME_INTERVAL = 120   # Ticks between full snapshots, the rest are deltas
+
+# Numeric observations
+OBS_TILE_SIZE    = 40    # Pixels per tile of the solid grid, the grid covers the screen
+OBS_MAX_ENTITIES = 16    # Rows of nearby entities, the nearest ones are kept
+OBS_FRAME_SIZE   = (84, 84)  # Width and height of pixel observations
+OBS_FRAME_STACK  = 4     # Pixel frames per observation, oldest first
+
+# Rewards of the training environment
+SCORE_REWARD    = 0.01   # Per point scored
+COIN_REWARD     = 1      # Per coin collected
+PROGRESS_REWARD = 0.1    # Per pixel further right than before in the episode
+LIFE_REWARD     = -10    # Per life lost
+
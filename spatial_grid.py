@@ -0,0 +1,88 @@
+'''Uniform grid for fast collision queries against static level geometry'''
+
+from collections import defaultdict
+
+# Local imports
+from settings import GRID_CELL_SIZE, GRID_MARGIN
+
+
+class SpatialGrid:
+    '''Buckets static sprites (ground blocks, pipes, boxes) by the grid cells their rects cover.
+
+    Static sprites live in world coordinates, so they are bucketed once when
+    their chunk is loaded and never have to be rebucketed.
+    '''
+    def __init__(self, *groups, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.order = {}         # sprite -> insertion index, used to mimic group iteration order
+        self.sprite_cells = {}  # sprite -> keys of the cells it is in
+        self.count = 0
+        for group in groups:
+            self.add(*group)
+
+    def add(self, *sprites):
+        '''Adds sprites to every cell their (slightly inflated) rect covers'''
+        for sprite in sprites:
+            if sprite in self.order:
+                continue
+            self.order[sprite] = self.count
+            self.count += 1
+            # Blocks bob a few pixels when bumped, the margin keeps them inside their cells
+            rect = sprite.rect.inflate(GRID_MARGIN * 2, GRID_MARGIN * 2)
+            self.sprite_cells[sprite] = list(self.__cells(rect))
+            for cell in self.sprite_cells[sprite]:
+                self.cells[cell].append(sprite)
+
+    def remove(self, *sprites):
+        '''Removes sprites from the grid'''
+        for sprite in sprites:
+            if self.order.pop(sprite, None) is None:
+                continue
+            for cell in self.sprite_cells.pop(sprite):
+                self.cells[cell].remove(sprite)
+                if not self.cells[cell]:
+                    del self.cells[cell]
+
+    def query(self, rect, group=None):
+        '''Returns the sprites in the cells covered by rect, without duplicates.
+
+        If a group is given, only sprites still in that group are returned.
+        '''
+        found = {}
+        for cell in self.__cells(rect):
+            for sprite in self.cells.get(cell, ()):
+                found[sprite] = None
+        if group is not None:
+            return [sprite for sprite in found if group.has_internal(sprite)]
+        return list(found)
+
+    def collide_any(self, sprite, *groups):
+        '''Returns a tuple with the first sprite colliding with sprite for each group (or None).
+
+        Works like calling pg.sprite.spritecollideany once per group, but only
+        looks at the sprites that share a cell with sprite.
+        '''
+        hits = [None] * len(groups)
+        rect = sprite.rect
+        for other in self.query(rect):
+            if not rect.colliderect(other.rect):
+                continue
+            for i, group in enumerate(groups):
+                if group.has_internal(other):
+                    if hits[i] is None or self.order[other] < self.order[hits[i]]:
+                        hits[i] = other
+                    break
+
+        return tuple(hits)
+
+    def __cells(self, rect):
+        '''Yields the (column, row) keys of the world cells rect covers'''
+        size = self.cell_size
+        left = rect.left // size
+        right = rect.right // size
+        top = rect.top // size
+        bottom = rect.bottom // size
+        for col in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                yield (col, row)
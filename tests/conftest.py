@@ -0,0 +1,11 @@
+'''Runs the tests headless from the repository root, where the game finds its resources'''
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['MARIO_HEADLESS'] = '1'
+os.chdir(ROOT)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
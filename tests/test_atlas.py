@@ -0,0 +1,98 @@
+import sys
+
+import pygame as pg
+
+import atlas
+from atlas import pack, unpack, atlas_hash
+
+
+BUILDER = '''
+SCALE = {scale}
+
+
+def build_frames():
+    return {{'frames': [SCALE]}}
+'''
+
+
+def write_builder(tmp_path, scale=2, frames='[SCALE]'):
+    '''Writes a builder module, dropping any older import of it'''
+    (tmp_path / 'fake_builder.py').write_text(BUILDER.format(scale=scale).replace('[SCALE]', frames))
+    sys.modules.pop('fake_builder', None)
+
+
+def test_pack_unpack_round_trip():
+    colours = [(255, 0, 0, 255), (0, 255, 0, 128), (0, 0, 255, 255)]
+    frame_sets = {'a': [], 'b': []}
+    for i, colour in enumerate(colours * 20):
+        frame = pg.Surface((7 + i % 5, 3 + i % 4), pg.SRCALPHA)
+        frame.fill(colour)
+        frame_sets['a' if i % 2 else 'b'].append(frame)
+
+    surface, index = pack(frame_sets)
+    unpacked = unpack(surface, index)
+
+    assert surface.get_width() == atlas.ATLAS_WIDTH
+    for name, frames in frame_sets.items():
+        assert len(unpacked[name]) == len(frames)
+        for frame, copy in zip(frames, unpacked[name]):
+            assert copy.get_size() == frame.get_size()
+            assert copy.get_at((0, 0)) == frame.get_at((0, 0))
+            assert copy.get_at((copy.get_width() - 1, copy.get_height() - 1)) == frame.get_at((0, 0))
+
+
+def test_hash_follows_builder_code_and_constants(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    source = tmp_path / 'sheet.png'
+    source.write_bytes(b'sheet')
+    builders = {'fake': ('fake_builder:build_frames', (str(source),))}
+
+    write_builder(tmp_path)
+    first = atlas_hash(builders)
+    assert atlas_hash(builders) == first
+
+    # A constant the builder reads
+    write_builder(tmp_path, scale=3)
+    assert atlas_hash(builders) != first
+
+    # The builder itself, such as a slice rect
+    write_builder(tmp_path, frames='[SCALE, 1]')
+    assert atlas_hash(builders) != first
+
+    # The files it reads
+    write_builder(tmp_path)
+    source.write_bytes(b'other sheet')
+    assert atlas_hash(builders) != first
+
+
+def use_cache(tmp_path, monkeypatch):
+    '''Points the atlas at an empty cache in tmp_path and forgets the frames loaded so far'''
+    import game_setup   # The display the atlas is converted for
+    monkeypatch.setattr(atlas, 'CACHE_PATH', str(tmp_path))
+    monkeypatch.setattr(atlas, 'IMAGE_FILE', str(tmp_path / 'atlas.png'))
+    monkeypatch.setattr(atlas, 'INDEX_FILE', str(tmp_path / 'atlas.json'))
+    monkeypatch.setattr(atlas, '_frames', None)
+
+
+def test_cache_is_written_whole_and_read_back(tmp_path, monkeypatch):
+    use_cache(tmp_path, monkeypatch)
+    built = atlas.load_atlas()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['atlas.json', 'atlas.png']
+
+    monkeypatch.setattr(atlas, 'build', None)
+    monkeypatch.setattr(atlas, '_frames', None)
+    cached = atlas.load_atlas()
+    frames, copies = built['goomba']['goomba'], cached['goomba']['goomba']
+    assert [pg.image.tobytes(frame, 'RGBA') for frame in frames] == [pg.image.tobytes(copy, 'RGBA') for copy in copies]
+
+
+def test_unreadable_cache_is_built_again(tmp_path, monkeypatch):
+    use_cache(tmp_path, monkeypatch)
+    atlas.load_atlas()
+    image = tmp_path / 'atlas.png'
+    image.write_bytes(image.read_bytes()[:100])
+
+    monkeypatch.setattr(atlas, '_frames', None)
+    frames = atlas.load_atlas()
+    assert len(frames['coin']['coin']) == 6
+    assert atlas._read_cache(atlas.atlas_hash()) is not None
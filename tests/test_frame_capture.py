@@ -0,0 +1,74 @@
+import io
+import threading
+import time
+
+import pygame as pg
+import pytest
+
+from frame_capture import FrameCapture, DROP, BLOCK
+
+
+class BrokenStream:
+    '''A pipe whose reader went away after a number of frames'''
+    def __init__(self, frames):
+        self.frames = frames
+
+    def write(self, data):
+        if not self.frames:
+            raise BrokenPipeError('reader is gone')
+        self.frames -= 1
+
+    def flush(self):
+        pass
+
+
+def surface(value):
+    image = pg.Surface((4, 3))
+    image.fill((value, value, value))
+    return image
+
+
+def test_stream_gets_raw_frames_in_order():
+    stream = io.BytesIO()
+    capture = FrameCapture(stream=stream, policy=BLOCK)
+    for value in range(5):
+        capture.capture(surface(value))
+    capture.close()
+
+    assert capture.written == 5
+    assert stream.getvalue() == b''.join(bytes([value]) * 36 for value in range(5))
+
+
+def test_directory_gets_numbered_pngs(tmp_path):
+    capture = FrameCapture(str(tmp_path), policy=BLOCK)
+    for value in range(3):
+        capture.capture(surface(value))
+    capture.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f'frame_{i:06d}.png' for i in range(3)]
+
+
+@pytest.mark.parametrize('policy', [DROP, BLOCK])
+def test_write_error_is_raised_instead_of_hanging(policy):
+    capture = FrameCapture(stream=BrokenStream(2), policy=policy, queue_size=1)
+
+    raised = []
+
+    def capture_until_error():
+        deadline = time.monotonic() + 5
+        try:
+            while time.monotonic() < deadline:
+                capture.capture(surface(0))
+        except BrokenPipeError as error:
+            raised.append(error)
+
+    thread = threading.Thread(target=capture_until_error)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+
+    assert raised
+    assert isinstance(capture.error, BrokenPipeError)
+    assert capture.written == 2
+    with pytest.raises(BrokenPipeError):
+        capture.close()
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from mario_env import MarioEnv
+
+
+@pytest.mark.parametrize('observation', ['player', 'level', 'pixels'])
+def test_observation_spec_matches_observations(observation):
+    env = MarioEnv(max_steps=10, observation=observation)
+    env.reset()
+    spec = env.observation_spec()
+    obs, *_ = env.step(0)
+
+    if not isinstance(obs, dict):
+        obs = {None: obs}
+    assert spec == {key: (array.shape, array.dtype.str) for key, array in obs.items()}
+
+
+def test_observation_spec_leaves_frame_stack_alone():
+    env = MarioEnv(observation='pixels')
+    frames = env.reset()['frames']
+    env.observation_spec()
+
+    assert np.array_equal(env.observe(new_frame=False)['frames'], frames)
@@ -0,0 +1,91 @@
+from camera import Camera
+from particles import ParticleSystem, PIECE, COIN, SCORE, COIN_SCORE
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0
+
+    def now(self):
+        return self.time
+
+
+class FakeWindow:
+    '''Records the blits drawn on it'''
+    def __init__(self):
+        self.drawn = []
+
+    def get_size(self):
+        return 800, 600
+
+    def blits(self, sequence, doreturn=True):
+        self.drawn.extend(sequence)
+
+
+def live_values(particles):
+    return sorted(particles.value[:particles.count].tolist())
+
+
+def test_full_system_replaces_the_oldest_particle():
+    particles = ParticleSystem(FakeClock(), capacity=4)
+    for value in range(4):
+        particles.score(value, 0, 0)
+    assert len(particles) == 4
+
+    row = particles.spawn(SCORE, 0, 0, 10)
+    assert row == 0
+    assert len(particles) == 4
+    assert live_values(particles) == [1, 2, 3, 10]
+
+    particles.score(11, 0, 0)
+    assert live_values(particles) == [2, 3, 10, 11]
+
+
+def test_oldest_is_still_replaced_after_dead_rows_are_dropped():
+    clock = FakeClock()
+    particles = ParticleSystem(clock, capacity=3)
+    # Brick pieces fall until they leave the screen, the score label expires
+    for corner in range(3):
+        particles.spawn(PIECE, 100, 100, corner)
+    particles.score(7, 0, 0)
+    assert particles.value[:3].tolist() == [7, 1, 2]
+    clock.time = 10 ** 6
+    particles.update(clock.now())
+    assert particles.value[:2].tolist() == [1, 2]
+
+    particles.score(8, 0, 0)
+    particles.score(9, 0, 0)
+    # The piece from corner 1 was the oldest
+    assert live_values(particles) == [2, 8, 9]
+
+
+def test_landed_coin_leaves_its_score():
+    clock = FakeClock()
+    particles = ParticleSystem(clock, capacity=8)
+    particles.coin(200, 300)
+    for _ in range(200):
+        particles.update(clock.now())
+        if particles.kind[0] == SCORE:
+            break
+
+    assert len(particles) == 1
+    assert particles.kind[0] == SCORE
+    assert particles.value[0] == COIN_SCORE
+
+
+def test_draw_only_draws_kinds():
+    particles = ParticleSystem(FakeClock())
+    particles.brick_pieces(300, 300)
+    particles.coin(200, 300)
+    particles.score(100, 50, 50)
+
+    drawn = {}
+    for kind in (PIECE, COIN, SCORE):
+        win = FakeWindow()
+        particles.draw(win, Camera(), (kind,))
+        drawn[kind] = win.drawn
+    win = FakeWindow()
+    particles.draw(win, Camera())
+
+    assert [len(drawn[kind]) for kind in (PIECE, COIN, SCORE)] == [4, 1, 1]
+    assert sorted(map(repr, win.drawn)) == sorted(map(repr, drawn[PIECE] + drawn[COIN] + drawn[SCORE]))
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from rewind import RewindBuffer, keyframe_cost, delta_cost
+
+
+class FakeLevel:
+    '''Stands in for Level1, its state is a bytes blob'''
+    def __init__(self):
+        self.state = b''
+        self.restored = None
+
+    def snapshot(self):
+        return self.state
+
+    def restore(self, data):
+        self.restored = data
+
+
+def states(count, seed=0, size=300):
+    '''Returns blobs that change a few bytes and sometimes their length from one to the next'''
+    rng = random.Random(seed)
+    state = bytearray(rng.randbytes(size))
+    result = []
+    for _ in range(count):
+        for _ in range(3):
+            state[rng.randrange(len(state))] = rng.randrange(256)
+        if rng.random() < 0.1:
+            state = state[:-rng.randrange(1, 5)] if rng.random() < 0.5 else state + bytes(rng.randrange(1, 5))
+        result.append(bytes(state))
+
+    return result
+
+
+def record(buffer, blobs):
+    level = FakeLevel()
+    for blob in blobs:
+        level.state = blob
+        buffer.record(level)
+
+    return level
+
+
+def held_bytes(buffer):
+    '''Recounts the bytes the buffer should be accounting for'''
+    return sum(
+        keyframe_cost(segment) + sum(delta_cost(entry) for entry in segment[1])
+        for segment in buffer.segments
+    )
+
+
+def test_keyframes_and_deltas_round_trip():
+    blobs = states(50)
+    buffer = RewindBuffer(budget_mb=1, keyframe_interval=8)
+    record(buffer, blobs)
+
+    assert len(buffer) == len(blobs)
+    assert len(buffer.segments) == 7
+    for ticks in range(len(blobs)):
+        assert buffer.peek(ticks) == blobs[-1 - ticks]
+    with pytest.raises(IndexError):
+        buffer.peek(len(blobs))
+
+
+def test_rewind_restores_and_forgets_newer_ticks():
+    blobs = states(20)
+    buffer = RewindBuffer(budget_mb=1, keyframe_interval=8)
+    level = record(buffer, blobs)
+
+    assert buffer.rewind(level, 3)
+    assert level.restored == blobs[-4]
+    assert len(buffer) == len(blobs) - 3
+    assert buffer.size == held_bytes(buffer)
+
+    # Recording goes on from the restored tick
+    level.state = blobs[0]
+    buffer.record(level)
+    assert buffer.peek() == blobs[0]
+    assert buffer.peek(1) == blobs[-4]
+
+    assert not buffer.rewind(level, len(buffer))
+
+
+def test_eviction_keeps_budget_and_newest_ticks():
+    blobs = states(400, size=2000)
+    budget_mb = 0.02
+    buffer = RewindBuffer(budget_mb=budget_mb, keyframe_interval=10)
+    record(buffer, blobs)
+
+    assert buffer.size == held_bytes(buffer)
+    assert buffer.size <= budget_mb * 1024 * 1024
+    assert 0 < len(buffer) < len(blobs)
+    assert len(buffer) == sum(1 + len(deltas) for _, deltas in buffer.segments)
+    for ticks in range(len(buffer)):
+        assert buffer.peek(ticks) == blobs[-1 - ticks]
+
+
+def test_budget_counts_object_overhead():
+    blobs = states(30)
+    buffer = RewindBuffer(budget_mb=1, keyframe_interval=30)
+    record(buffer, blobs)
+
+    payload = len(buffer.segments[0][0]) + sum(len(delta) for _, delta in buffer.segments[0][1])
+    assert buffer.size > payload + 29 * 50
+
+
+def test_clear():
+    buffer = RewindBuffer(budget_mb=1, keyframe_interval=4)
+    record(buffer, states(10))
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.size == 0
+    assert not buffer.segments
@@ -0,0 +1,74 @@
+import random
+
+import pygame as pg
+import pytest
+
+import savestate
+from input_replay import KEY_BITS
+from mario_env import MarioEnv, NUM_ACTIONS
+
+RIGHT = KEY_BITS[pg.K_RIGHT]
+JUMP = KEY_BITS[pg.K_SPACE]
+BUTTONS = (0, 0, KEY_BITS[pg.K_UP], JUMP, KEY_BITS[pg.K_f])
+
+
+def actions(seed, count):
+    '''Mostly runs right so Mario meets goombas, boxes and pits'''
+    rng = random.Random(seed)
+    return [
+        RIGHT | rng.choice(BUTTONS) if rng.random() < 0.8 else rng.randrange(NUM_ACTIONS)
+        for _ in range(count)
+    ]
+
+
+def play(env, actions):
+    '''Steps env through actions and returns the snapshot after each one'''
+    snapshots = []
+    for action in actions:
+        env.step(action)
+        snapshots.append(env.level.snapshot())
+
+    return snapshots
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_restored_level_plays_out_the_same(seed):
+    steps = actions(seed, 400)
+    original = MarioEnv()
+    play(original, steps[:150])
+    snapshot = original.level.snapshot()
+
+    copy = MarioEnv()
+    copy.level.restore(snapshot)
+    assert copy.level.snapshot() == snapshot
+    assert copy.player.rect == original.player.rect
+    assert len(copy.level.walkers) == len(original.level.walkers)
+
+    assert play(copy, steps[150:]) == play(original, steps[150:])
+
+
+def test_restore_rebuilds_released_chunks():
+    # Running and hopping gets past the first goombas and pipes
+    steps = [RIGHT | (JUMP if (step // 20) % 2 == 0 else 0) for step in range(900)]
+    original = MarioEnv()
+    snapshots = play(original, steps[:800])
+    stream = original.level.stream
+    assert len(stream.loaded) < stream.next_chunk
+    assert sorted(stream.sprites) == [index for index, _ in stream.loaded]
+    assert len(snapshots[-1]) < len(snapshots[0])
+    later = play(original, steps[800:])
+
+    # Into a new game, which has none of the chunks, and back from further on like a rewind
+    for copy in (MarioEnv(), original):
+        copy.level.restore(snapshots[-1])
+        assert copy.level.snapshot() == snapshots[-1]
+        assert play(copy, steps[800:]) == later
+
+
+def test_restore_rejects_other_versions():
+    env = MarioEnv()
+    snapshot = bytearray(env.level.snapshot())
+    snapshot[4] = savestate.VERSION + 1
+
+    with pytest.raises(ValueError):
+        env.level.restore(bytes(snapshot))
@@ -0,0 +1,63 @@
+import random
+
+import pygame as pg
+
+from spatial_grid import SpatialGrid
+
+
+def block(x, y, width=40, height=40):
+    sprite = pg.sprite.Sprite()
+    sprite.rect = pg.Rect(x, y, width, height)
+
+    return sprite
+
+
+def layout(rng, count):
+    return [
+        block(rng.randrange(-200, 3000), rng.randrange(0, 600), rng.randrange(10, 300), rng.randrange(10, 120))
+        for _ in range(count)
+    ]
+
+
+def test_collide_any_matches_spritecollideany():
+    rng = random.Random(1)
+    groups = [pg.sprite.Group(layout(rng, 60)) for _ in range(3)]
+    grid = SpatialGrid(*groups, cell_size=100)
+
+    for round_ in range(4):
+        for _ in range(300):
+            probe = block(rng.randrange(-300, 3100), rng.randrange(-50, 650), rng.randrange(5, 80), rng.randrange(5, 80))
+            expected = tuple(pg.sprite.spritecollideany(probe, group) for group in groups)
+            assert grid.collide_any(probe, *groups) == expected
+
+        # Removed sprites are gone from the grid, added ones go after everything else
+        for group in groups:
+            removed = rng.sample(group.sprites(), 10)
+            group.remove(*removed)
+            grid.remove(*removed)
+            added = layout(rng, 5)
+            group.add(*added)
+            grid.add(*added)
+
+
+def test_query_returns_each_sprite_once():
+    groups = pg.sprite.Group(), pg.sprite.Group()
+    wide = block(0, 0, 450, 40)
+    small = block(120, 10, 20, 20)
+    other = block(130, 0)
+    groups[0].add(wide, small)
+    groups[1].add(other)
+    grid = SpatialGrid(*groups, cell_size=100)
+
+    found = grid.query(pg.Rect(0, 0, 500, 100))
+    assert sorted(map(id, found)) == sorted(map(id, (wide, small, other)))
+    assert set(grid.query(pg.Rect(0, 0, 500, 100), groups[1])) == {other}
+
+    grid.remove(wide, object())
+    groups[0].remove(wide)
+    assert wide not in grid.query(pg.Rect(0, 0, 500, 100))
+    assert grid.collide_any(block(300, 0), *groups) == (None, None)
+
+    grid.remove(small, other)
+    assert not grid.cells
+    assert not grid.sprite_cells
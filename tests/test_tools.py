@@ -0,0 +1,19 @@
+import pygame as pg
+
+from game_setup import IMAGES
+from tools import get_image, scale_image
+
+
+def test_get_image_shares_frames_without_filling_scale_cache():
+    sheet = IMAGES['goomba_sprites']
+    scale_image.cache_clear()
+    get_image.cache_clear()
+
+    first = get_image(sheet, 120, 41, 160, 160, 0.2)
+    again = get_image(sheet, 120, 41, 160, 160, 0.2)
+
+    assert again is first
+    assert first.get_size() == (32, 32)
+    assert scale_image.cache_info().currsize == 0
+    unscaled = get_image(sheet, 120, 41, 160, 160)
+    assert pg.image.tobytes(first, 'RGBA') == pg.image.tobytes(pg.transform.scale(unscaled, (32, 32)), 'RGBA')
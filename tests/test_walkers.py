@@ -0,0 +1,194 @@
+import pygame as pg
+import pytest
+
+from camera import Camera
+from characters.enemies import Goomba
+from characters.entity_constants import *
+from characters.walkers import FIELDS, WalkerManager
+from objects.ground_blocks import GroundBlock
+from objects.pipe import Pipe
+from settings import HEIGHT
+from spatial_grid import SpatialGrid
+from tools import get_mask
+
+
+# The per sprite simulation WalkerManager replaced, kept as the reference it has to match
+
+def reference_collide(goomba, solids, boxes, pipes, ground_blocks):
+    goomba.pos.x += goomba.vel.x
+    goomba.rect.centerx = goomba.pos.x
+    for sprite in solids.collide_any(goomba, boxes, pipes, ground_blocks):
+        if sprite:
+            if goomba.vel.x > 0:
+                goomba.rect.right = sprite.rect.left
+                goomba.vel.x = -ENEMY_VEL_X
+            else:
+                goomba.rect.left = sprite.rect.right
+                goomba.vel.x = ENEMY_VEL_X
+            goomba.pos.x = goomba.rect.centerx
+
+    goomba.pos.y += goomba.vel.y
+    goomba.rect.bottom = goomba.pos.y
+    for sprite in solids.collide_any(goomba, boxes, pipes, ground_blocks):
+        if sprite:
+            if goomba.vel.y > 0:
+                goomba.rect.bottom = sprite.rect.top
+                goomba.vel.y = 0
+            else:
+                goomba.rect.top = sprite.rect.bottom
+            goomba.pos.y = goomba.rect.bottom
+
+
+def reference_update(goomba, current_time, solids, boxes, pipes, ground_blocks):
+    if goomba.state == DYING:
+        goomba.vel.update(0, 0)
+        goomba.rect = goomba.image.get_rect()
+        goomba.rect.midbottom = goomba.pos
+        delta_time = current_time - goomba.kill_timer
+        if 0 <= delta_time < 800:
+            goomba.image = goomba.images[2]
+        elif delta_time >= 800:
+            goomba.kill()
+    elif goomba.state == FLIPPED:
+        goomba.image = goomba.images[3]
+        goomba.vel.y += GOOMBA_FALL_GRAVITY
+        goomba.pos += goomba.vel
+        goomba.rect.midbottom = goomba.pos
+    else:
+        if goomba.vel.y < MAX_VEL_Y:
+            goomba.vel.y += GRAVITY
+        goomba.image = goomba.images[goomba.image_count // 10 % 2]
+        goomba.image_count += 1
+        goomba.rect = goomba.image.get_rect()
+        goomba.rect.midbottom = goomba.pos
+        reference_collide(goomba, solids, boxes, pipes, ground_blocks)
+        goomba.rect.midbottom = goomba.pos
+        goomba.mask = get_mask(goomba.image)
+
+    if goomba.pos.y >= HEIGHT:
+        goomba.kill()
+
+
+class Scene:
+    '''Ground with a gap, two pipes and one floating block'''
+    def __init__(self):
+        self.ground_blocks = pg.sprite.Group(GroundBlock(x=0, width=700), GroundBlock(x=800, width=1400))
+        self.pipes = pg.sprite.Group(Pipe(x=350, height='tall'), Pipe(x=1200, height='short'))
+        block = pg.sprite.Sprite()
+        block.rect = pg.Rect(560, 470, 42, 42)
+        self.boxes = pg.sprite.Group(block)
+        self.solids = SpatialGrid(self.boxes, self.pipes, self.ground_blocks)
+        self.groups = (self.boxes, self.pipes, self.ground_blocks)
+
+
+def goombas():
+    '''Goombas walking, falling, squashed and flipped, some far outside the first window'''
+    result = [Goomba(x=x) for x in (100, 230, 420, 520, 690, 760, 1000, 1300, 1700)]
+    result.append(Goomba(x=600, y=300))
+    result[3].state = DYING
+    result[3].kill_timer = 40
+    result[5].state = FLIPPED
+    result[5].vel.update(-3, -10)
+
+    return result
+
+
+def assert_same(reference, walkers, simulated):
+    for expected, actual in zip(reference, simulated):
+        assert expected.alive() == actual.alive()
+    walkers.materialise([pg.Rect(-10000, -10000, 30000, 30000)])
+    for expected, actual in zip(reference, simulated):
+        if not expected.alive():
+            continue
+        assert actual.pos == expected.pos
+        assert actual.vel == expected.vel
+        assert actual.state == expected.state
+        assert actual.image is expected.image
+        assert actual.mask is expected.mask
+        assert actual.rect == expected.rect
+        assert actual.image_count == expected.image_count
+        assert actual.kill_timer == expected.kill_timer
+
+
+@pytest.mark.parametrize('camera_speed', [0, 3])
+def test_matches_reference_update(camera_speed):
+    scene = Scene()
+    reference = goombas()
+    simulated = goombas()
+    reference_group = pg.sprite.Group(reference)
+    simulated_group = pg.sprite.Group(simulated)
+    walkers = WalkerManager(capacity=4)
+    walkers.add(*simulated)
+    camera = Camera()
+
+    for tick in range(400):
+        current_time = tick * 16
+        camera.move_to(tick * camera_speed)
+        for goomba in camera.active(reference_group):
+            if goomba.state == DEACTIVATED:
+                goomba.state = ACTIVATED
+            reference_update(goomba, current_time, scene.solids, *scene.groups)
+        walkers.update(current_time, camera, scene.solids, *scene.groups)
+
+        if tick == 150:
+            # Mario stomps one goomba and a fireball flips another
+            for goombas_, absorb in ((reference, False), (simulated, True)):
+                stomped, shot = goombas_[0], goombas_[6]
+                if absorb:
+                    walkers.materialise([stomped.rect, shot.rect])
+                stomped.state = DYING
+                stomped.kill_timer = current_time
+                shot.state = FLIPPED
+                shot.vel.update(2, -11)
+                if absorb:
+                    walkers.absorb([stomped, shot])
+
+        if tick % 25 == 0:
+            assert_same(reference, walkers, simulated)
+    assert_same(reference, walkers, simulated)
+    assert len(walkers) == len(simulated_group)
+    assert len(simulated_group) < len(simulated)
+
+
+def test_previous_is_where_the_last_update_started():
+    scene = Scene()
+    simulated = goombas()
+    walkers = WalkerManager()
+    walkers.add(*simulated)
+    camera = Camera()
+    everywhere = pg.Rect(-10000, -10000, 20000, 20000)
+
+    for tick in range(60):
+        before = {goomba: goomba.rect.midbottom for goomba in walkers.materialise([everywhere])}
+        walkers.update(tick * 16, camera, scene.solids, *scene.groups)
+        moved = walkers.materialise([everywhere])
+        assert walkers.previous(moved) == {goomba: before[goomba] for goomba in moved}
+    assert any(goomba.rect.midbottom != before[goomba] for goomba in moved)
+
+
+def test_remove_and_compact_keep_order():
+    walkers = WalkerManager(capacity=2)
+    simulated = [Goomba(x=x) for x in range(100, 1000, 100)]
+    walkers.add(*simulated)
+    walkers.remove(*simulated[:5], object())
+
+    assert len(walkers) == 4
+    assert walkers.sprites == simulated[5:]
+    assert [walkers.rows[goomba] for goomba in simulated[5:]] == [0, 1, 2, 3]
+    assert walkers.x[:walkers.count].tolist() == [goomba.pos.x for goomba in simulated[5:]]
+
+
+def test_set_rows_restores_live_rows():
+    walkers = WalkerManager()
+    simulated = [Goomba(x=x) for x in (100, 200, 300)]
+    walkers.add(*simulated)
+    walkers.x[1] = 250.5
+    walkers.remove(simulated[0])
+    rows = walkers.live()
+    arrays = {name: getattr(walkers, name)[rows].copy() for name, _ in FIELDS}
+
+    restored = WalkerManager()
+    restored.set_rows([walkers.sprites[row] for row in rows.tolist()], arrays)
+    assert restored.sprites == simulated[1:]
+    restored.store(simulated)
+    assert simulated[1].pos.x == 250.5
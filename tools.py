@@ -1,6 +1,8 @@
 '''General tool functions'''
 
+from functools import lru_cache
 from os import path, listdir
+from weakref import WeakKeyDictionary
 
 # Local imports
 import pygame as pg
@@ -16,9 +18,11 @@ def load_files(dir, type, accepted):
             obj = None
             if type == 'image':
                 obj = pg.image.load(path.join(dir, f))
-                obj = obj.convert_alpha()
+                if not HEADLESS:
+                    # Nothing is shown in headless mode, so skip the conversion
+                    obj = obj.convert_alpha()
             elif type == 'sound':
-                obj = pg.mixer.Sound(path.join(dir, f))
+                obj = SilentSound() if HEADLESS else pg.mixer.Sound(path.join(dir, f))
             elif type == 'music' or type == 'font' or type == 'data':
                 obj = path.join(dir, f)
             if obj:
@@ -27,19 +31,70 @@ def load_files(dir, type, accepted):
     return file_dict
 
 
+class SilentSound:
+    '''Stands in for pg.mixer.Sound and pg.mixer.music when there is no audio device'''
+    def play(self, *args, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, value):
+        pass
+
+    def load(self, filename):
+        pass
+
+    def get_busy(self):
+        return False
+
+
+# Masks built from animation frames, freed together with the frame surface
+_masks = WeakKeyDictionary()
+
+
+def get_mask(img):
+    '''Returns the collision mask of an image, only building it the first time'''
+    mask = _masks.get(img)
+    if mask is None:
+        mask = _masks[img] = pg.mask.from_surface(img)
+
+    return mask
+
+
+@lru_cache(maxsize=None)
+def get_font(font_file, size):
+    '''Returns the shared font object for a font file and size'''
+    return pg.font.Font(font_file, size)
+
+
+def _scaled_size(img, scalar):
+    '''Returns the size of img scaled evenly by scalar'''
+    return round(img.get_width() * scalar), round(img.get_height() * scalar)
+
+
+# The image functions below are memoized: identical frames are computed once and
+# the same surface is shared by every caller, so results must never be drawn on,
+# filled or converted in place. Copy a result before changing it.
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def resize_image(img, size):
+    '''Scales an image to a specified (width, height)'''
+    return pg.transform.scale(img, size)
+
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
 def scale_image(img, scalar):
     '''Scales an image evenly by a specified factor'''
-    return pg.transform.scale(
-        img, 
-        (
-            round(img.get_width() * scalar),
-            round(img.get_height() * scalar)
-        )
-    )
+    return pg.transform.scale(img, _scaled_size(img, scalar))
 
 
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
 def get_image(spritesheet, x, y, width, height, scalar=None):
-    '''Function that retrieves and returns an image from a sprite sheet'''
+    '''Function that retrieves and returns an image from a sprite sheet.
+
+    The image is shared with every other caller asking for the same frame, so it must not be changed.
+    '''
     # Creates a surface with the right dimensions
     img = pg.Surface((width, height)).convert_alpha()
     # Makes the surface transparent
@@ -48,6 +103,23 @@ def get_image(spritesheet, x, y, width, height, scalar=None):
     img.blit(spritesheet, (0,0), (x, y, width, height))
 
     if scalar:
-        img = scale_image(img, scalar)
+        # Not through scale_image, caching the throwaway unscaled surface would crowd out real frames
+        img = pg.transform.scale(img, _scaled_size(img, scalar))
 
     return img
+
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def get_rotations(img, steps):
+    '''Returns img rotated by each of steps evenly spaced angles, counterclockwise from 0'''
+    return tuple(pg.transform.rotozoom(img, i * 360 / steps, 1) for i in range(steps))
+
+
+def image_cache_info():
+    '''Returns the hits, misses and size of the shared image caches'''
+    infos = [f.cache_info() for f in (get_image, scale_image, resize_image, get_rotations)]
+    return {
+        'hits': sum(info.hits for info in infos),
+        'misses': sum(info.misses for info in infos),
+        'size': sum(info.currsize for info in infos)
+    }